@@ -0,0 +1,27 @@
+"""Add project revision
+
+Revision ID: 3f2b8c1d9e4a
+Revises: 9558ff7c7c32
+Create Date: 2026-10-19 09:12:44.503218
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2b8c1d9e4a'
+down_revision: str | None = '9558ff7c7c32'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('revision')
@@ -5,54 +5,95 @@ Revises:
 Create Date: 2025-03-01 22:47:01.119423
 
 """
-from typing import Sequence, Union
+from collections.abc import Sequence
 
-from alembic import op
 import sqlalchemy as sa
 
+from alembic import op
 
 # revision identifiers, used by Alembic.
 revision: str = '9558ff7c7c32'
-down_revision: Union[str, None] = None
-branch_labels: Union[str, Sequence[str], None] = None
-depends_on: Union[str, Sequence[str], None] = None
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _create_tables() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'),
+              nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('projects',
+    sa.Column('id', sa.String(length=26), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('owner', sa.String(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'),
+              nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['owner'], ['users.username'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_projects_id'), 'projects', ['id'], unique=False)
+    op.create_index(op.f('ix_projects_owner'), 'projects', ['owner'], unique=False)
+    op.create_table('layers',
+    sa.Column('id', sa.String(length=26), nullable=False),
+    sa.Column('project_id', sa.String(length=26), nullable=True),
+    sa.Column('type', sa.String(), nullable=True),
+    sa.Column('properties', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'),
+              nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_layers_id'), 'layers', ['id'], unique=False)
 
 
 def upgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('layers', 'id',
+    if not sa.inspect(op.get_bind()).has_table('projects'):
+        # A new database: create the tables as they were at this revision
+        _create_tables()
+        return
+
+    # Databases created by the app's old create_all at startup: batch mode, since SQLite can't ALTER COLUMN
+    with op.batch_alter_table('layers') as batch_op:
+        batch_op.alter_column('id',
                existing_type=sa.TEXT(),
                type_=sa.String(length=26),
                existing_nullable=False)
-    op.alter_column('layers', 'project_id',
+        batch_op.alter_column('project_id',
                existing_type=sa.INTEGER(),
                type_=sa.String(length=26),
                existing_nullable=True)
-    op.alter_column('projects', 'id',
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.alter_column('id',
                existing_type=sa.TEXT(),
                type_=sa.String(length=26),
                existing_nullable=False)
-    op.alter_column('projects', 'owner',
+        batch_op.alter_column('owner',
                existing_type=sa.VARCHAR(),
                nullable=False)
-    # ### end Alembic commands ###
 
 
 def downgrade() -> None:
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('projects', 'owner',
-               existing_type=sa.VARCHAR(),
-               nullable=True)
-    op.alter_column('projects', 'id',
-               existing_type=sa.String(length=26),
-               type_=sa.TEXT(),
-               existing_nullable=False)
-    op.alter_column('layers', 'project_id',
-               existing_type=sa.String(length=26),
-               type_=sa.INTEGER(),
-               existing_nullable=True)
-    op.alter_column('layers', 'id',
-               existing_type=sa.String(length=26),
-               type_=sa.TEXT(),
-               existing_nullable=False)
-    # ### end Alembic commands ###
+    # Back to an empty database: the tables and indexes of the new-database path. Databases
+    # upgraded in place from the old create_all schema can't be restored to it either way.
+    op.drop_index(op.f('ix_layers_id'), table_name='layers')
+    op.drop_table('layers')
+    op.drop_index(op.f('ix_projects_owner'), table_name='projects')
+    op.drop_index(op.f('ix_projects_id'), table_name='projects')
+    op.drop_table('projects')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
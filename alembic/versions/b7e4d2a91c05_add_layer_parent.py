@@ -0,0 +1,34 @@
+"""Add layer parent for groups
+
+Revision ID: b7e4d2a91c05
+Revises: 3f2b8c1d9e4a
+Create Date: 2026-10-19 14:03:27.118604
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a91c05'
+down_revision: str | None = '3f2b8c1d9e4a'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('layers') as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.String(length=26), nullable=True))
+        batch_op.create_index(batch_op.f('ix_layers_parent_id'), ['parent_id'], unique=False)
+        batch_op.create_foreign_key(
+            'fk_layers_parent_id_layers', 'layers', ['parent_id'], ['id'], ondelete='CASCADE'
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('layers') as batch_op:
+        batch_op.drop_constraint('fk_layers_parent_id_layers', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_layers_parent_id'))
+        batch_op.drop_column('parent_id')
@@ -0,0 +1,27 @@
+"""Add layer version
+
+Revision ID: e5c1a7f3b209
+Revises: b7e4d2a91c05
+Create Date: 2026-10-19 16:05:31.274810
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c1a7f3b209'
+down_revision: str | None = 'b7e4d2a91c05'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('layers', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('layers') as batch_op:
+        batch_op.drop_column('version')
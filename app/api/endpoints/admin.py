@@ -0,0 +1,50 @@
+import json
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import FileResponse
+
+from app.api.deps import is_admin
+from app.api.profiling import profile_path
+
+router = APIRouter()
+
+ProfileId = Annotated[str, Path(pattern="^[0-9A-HJ-KM-NP-Z]{26}$")]
+
+
+def _require_admin(is_admin: bool) -> None:
+    if not is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Only admins can read request profiles",
+        )
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: ProfileId, is_admin: Annotated[bool, Depends(is_admin)]) -> Any:
+    """
+    Get the summary of a profiled request: SQL statements and the slowest functions (admin only).
+    """
+    _require_admin(is_admin)
+
+    summary_path = profile_path(profile_id, ".json")
+    if not summary_path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return json.loads(summary_path.read_text())
+
+
+@router.get("/admin/profiles/{profile_id}/pstats", response_class=FileResponse)
+async def get_profile_stats(profile_id: ProfileId, is_admin: Annotated[bool, Depends(is_admin)]):
+    """
+    Download the raw cProfile dump of a profiled request (admin only).
+
+    Load it with `pstats.Stats` or a viewer such as snakeviz or speedscope.
+    """
+    _require_admin(is_admin)
+
+    stats_path = profile_path(profile_id, ".prof")
+    if not stats_path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return FileResponse(stats_path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -0,0 +1,64 @@
+from typing import Annotated
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.api.profiling import profiled
+from app.api.utils.admission import upload_cost, uploads
+from app.api.utils.archive import import_project_archive, stream_project_archive
+from app.api.utils.ingest import normalize_upload
+from app.api.utils.project import fetch_owned_project
+from app.models.user import User as UserModel
+from app.schemas.project import ProjectList
+
+router = APIRouter()
+
+
+@router.get(
+    "/projects/{project_id}/archive",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/zip": {}}, "description": "The project archive"}},
+)
+async def export_project_archive(
+    project_id: str,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """
+    Download a project as a portable archive: its details and layers as JSON, plus the
+    images its layers use. Restore it with `POST /projects/import`.
+    """
+    project = fetch_owned_project(db, project_id, current_user)
+
+    return StreamingResponse(
+        stream_project_archive(project.id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{project.id}.zip"'},
+    )
+
+
+@router.post("/projects/import", response_model=ProjectList)
+async def import_project(
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+    background_tasks: BackgroundTasks,
+    file: Annotated[UploadFile, File()] = ...,
+):
+    """
+    Create a new project from a project archive.
+
+    Layers are bulk inserted in a single transaction under new IDs, and images are
+    stored as uploads and normalized in the background.
+    """
+    with uploads.slot():
+        await run_in_threadpool(uploads.charge, current_user, upload_cost(file.size or 0))
+        project, images = await run_in_threadpool(
+            profiled(import_project_archive), db, file.file, current_user.username
+        )
+
+    for path in images:
+        background_tasks.add_task(normalize_upload, path)
+    return project
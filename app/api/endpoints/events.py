@@ -0,0 +1,81 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.api.utils.project import fetch_owned_project
+from app.core.change_feed import ChangeEvent, Subscription, change_broker
+from app.core.config import settings
+from app.models.user import User as UserModel
+
+router = APIRouter()
+
+
+def format_event(change: ChangeEvent) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (change.revision, change.kind.encode(), change.to_json())
+
+
+async def stream_changes(subscription: Subscription, request: Request) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                change = await asyncio.wait_for(subscription.queue.get(), settings.CHANGE_FEED_KEEPALIVE)
+            except TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+                continue
+
+            if subscription.lagged:
+                # Events were dropped for this client; tell it to reload instead.
+                latest = change.revision
+                while not subscription.queue.empty():
+                    latest = max(latest, subscription.queue.get_nowait().revision)
+                subscription.lagged = False
+                change = ChangeEvent(subscription.project_id, latest, "reset")
+
+            yield format_event(change)
+    finally:
+        change_broker.unsubscribe(subscription)
+
+
+@router.get(
+    "/projects/{project_id}/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-sent change events"}},
+)
+async def project_events(
+    project_id: str,
+    request: Request,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+    since: int | None = None,
+    last_event_id: Annotated[str | None, Header()] = None,
+):
+    """
+    Stream changes to a project as server-sent events, instead of polling.
+
+    Each event's id is the project revision it produced. Event types are `created`,
+    `patched` and `deleted` (with the layer), `project` (with the project details) and
+    `reset`, which means the missed changes aren't available and the project should be
+    reloaded. Resume with the `Last-Event-ID` header or the `since` query parameter; by
+    default the feed starts at the current revision.
+    """
+    project = fetch_owned_project(db, project_id, current_user)
+
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    if since is None:
+        since = project.revision
+
+    subscription = change_broker.subscribe(project.id, since, project.revision)
+    return StreamingResponse(
+        stream_changes(subscription, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,41 +1,85 @@
 import shutil
 from pathlib import Path
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile
+from typing import Annotated, Any
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
-from app.api.utils.project import fetch_owned_project
+from app.api.utils.admission import upload_cost, uploads
+from app.api.utils.ingest import normalize_upload
+from app.api.utils.layer_patch import (
+    MERGE_PATCH_TYPE,
+    changed_bbox,
+    etag_matches,
+    layer_etag,
+    patched_properties,
+)
+from app.api.utils.project import add_image_layer, check_image, fetch_owned_project, upload_path
 from app.models.layer import Layer as LayerModel
+from app.models.project import Project as ProjectModel
+from app.models.project import record_layer_change
 from app.models.user import User as UserModel
-from app.schemas.layer import ImageAdjustments, Layer
+from app.schemas.layer import GroupCreate, GroupUpdate, Layer, LayerParent
 from app.schemas.layer_properties import (
     ArcProperties,
     CircleProperties,
+    GroupProperties,
     PenProperties,
     RectangleProperties,
 )
 
 router = APIRouter()
 
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
 MAX_FILE_SIZE = 8 * 1024 * 1024
 
 
+def _store_upload(project_id: str, file: UploadFile) -> Path:
+    """Copy an uploaded file into place and check it is a supported image."""
+    file_path = upload_path(project_id, file.filename)
+    with file_path.open("wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    try:
+        check_image(file_path)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+    return file_path
+
+
 @router.post("/projects/{project_id}/upload")
 async def upload_image(
     project_id: str,
     current_user: Annotated[UserModel, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
+    background_tasks: BackgroundTasks,
     file: Annotated[UploadFile, File()] = ...,
 ):
-    """Upload an image and create an image layer."""
-    file_size = 0
-    contents = await file.read()
-    file_size = len(contents)
+    """
+    Upload an image and create an image layer.
+
+    The upload is normalized into a render-ready derivative in the background. Files
+    that aren't images are rejected with 400, and images over Pillow's decompression
+    bomb limit with 413. Files over 8MB should use a resumable upload
+    (`POST /projects/{project_id}/uploads`).
+    Uploads are charged against the user's rate limit by size (429 with Retry-After).
+    """
+    # Multipart parsing already spooled the file to disk; no need to read it into memory
+    file_size = file.size
 
     if file_size > MAX_FILE_SIZE:
         raise HTTPException(
@@ -43,38 +87,18 @@ async def upload_image(
             detail=f"File size exceeds maximum limit of {MAX_FILE_SIZE // (1024 * 1024)}MB",
         )
 
-    await file.seek(0)
-
     project = fetch_owned_project(db, project_id, current_user)
+    with uploads.slot():
+        await run_in_threadpool(uploads.charge, current_user, upload_cost(file_size))
+        file_path = await run_in_threadpool(_store_upload, project.id, file)
 
-    safe_filename = Path(file.filename).name
-    file_path = UPLOAD_DIR.joinpath(f"{project_id}_{safe_filename}")
+    try:
+        layer = add_image_layer(db, project, file_path)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
 
-    if file_path.exists():
-        raise HTTPException(
-            status_code=409,
-            detail="A file with this name already exists. Please rename the file and try again.",
-        )
-
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    layer = LayerModel(
-        project_id=project.id,
-        type="image",
-        properties={
-            "path": str(file_path),
-            "x": 0,
-            "y": 0,
-            "contrast": 1.0,
-            "brightness": 1.0,
-            "sharpness": 1.0,
-        },
-    )
-
-    db.add(layer)
-    db.commit()
-    db.refresh(layer)
+    background_tasks.add_task(normalize_upload, file_path)
     return layer
 
 
@@ -101,44 +125,93 @@ async def delete_layer(
     return Response(status_code=204)
 
 
-@router.patch("/projects/{project_id}/{layer_id}", response_model=Layer)
+@router.patch(
+    "/projects/{project_id}/{layer_id}",
+    response_model=Layer,
+    responses={412: {"description": "The layer has changed since the `If-Match` version"}},
+)
 async def patch_layer(
     project_id: str,
     layer_id: str,
-    adjustments: ImageAdjustments,
+    patch: Annotated[dict[str, Any], Body(media_type=MERGE_PATCH_TYPE)],
+    request: Request,
+    response: Response,
     current_user: Annotated[UserModel, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
+    if_match: Annotated[str | None, Header()] = None,
 ):
     """
-    Patch layer properties. Currently supports updating image adjustments
-    (contrast, brightness, sharpness) for image layers.
+    Patch any layer's properties with a JSON merge patch (RFC 7396), e.g. move a shape
+    with `{"x": 10, "y": 20}` or adjust an image with `{"contrast": 1.2}`. The result is
+    validated against the layer type's schema, and members the type doesn't have are
+    rejected with 422.
+
+    Send the layer's ETag (its quoted `version`) in `If-Match` to only patch that version;
+    otherwise 412. The response carries the new ETag, and the canvas area to redraw as
+    `X-Changed-BBox: left,top,right,bottom` when that can be told from the layer.
+    With a plain `application/json` body, null members are ignored rather than removed.
     """
-    project = fetch_owned_project(db, project_id, current_user)
-
-    layer = (
-        db.query(LayerModel).filter(LayerModel.id == layer_id, LayerModel.project_id == project.id).first()
-    )
-
+    # The current properties are needed to merge the patch into, validate the result and
+    # tell what was repainted, and SQLite's RETURNING only sees the new row, so they are
+    # read first. The UPDATE is still guarded by the version read.
+    layer = db.execute(
+        select(
+            LayerModel.type,
+            LayerModel.properties,
+            LayerModel.version,
+            LayerModel.parent_id,
+            LayerModel.created_at,
+        )
+        .join(ProjectModel, LayerModel.project_id == ProjectModel.id)
+        .where(
+            LayerModel.id == layer_id,
+            LayerModel.project_id == project_id,
+            ProjectModel.owner == current_user.username,
+        )
+    ).one_or_none()
     if not layer:
         raise HTTPException(status_code=404, detail="Layer not found")
+    if not etag_matches(if_match, layer.version):
+        raise HTTPException(
+            status_code=412, detail="Layer has been changed", headers={"ETag": layer_etag(layer.version)}
+        )
 
-    if layer.type != "image":
-        raise HTTPException(status_code=400, detail="Only image layers can be adjusted")
-
-    properties = dict(layer.properties)
-
-    if adjustments.contrast is not None:
-        properties["contrast"] = adjustments.contrast
-    if adjustments.brightness is not None:
-        properties["brightness"] = adjustments.brightness
-    if adjustments.sharpness is not None:
-        properties["sharpness"] = adjustments.sharpness
-
-    layer.properties = properties
+    if not request.headers.get("content-type", "").startswith(MERGE_PATCH_TYPE):
+        patch = {key: value for key, value in patch.items() if value is not None}
+    properties = patched_properties(layer.type, layer.properties, patch)
+
+    # Only applies if nothing changed the layer since it was read.
+    version = db.execute(
+        LayerModel.__table__.update()
+        .where(LayerModel.id == layer_id, LayerModel.version == layer.version)
+        .values(properties=properties, version=LayerModel.version + 1)
+        .returning(LayerModel.version)
+    ).scalar()
+    if version is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=412 if if_match else 409, detail="Layer was changed by another request"
+        )
 
+    patched = {
+        "id": layer_id,
+        "project_id": project_id,
+        "parent_id": layer.parent_id,
+        "type": layer.type,
+        "properties": properties,
+        "created_at": layer.created_at,
+        "version": version,
+    }
+    # The UPDATE bypasses the mapper events, so record the change for the project here. It
+    # is a second statement in the same transaction; SQLite can't update two tables at once.
+    record_layer_change(db, db.connection(), project_id, "patched", patched)
     db.commit()
-    db.refresh(layer)
-    return layer
+
+    response.headers["ETag"] = layer_etag(version)
+    bbox = await run_in_threadpool(changed_bbox, layer.type, layer.properties, properties)
+    if bbox is not None:
+        response.headers["X-Changed-BBox"] = ",".join(map(str, bbox))
+    return patched
 
 
 @router.post("/projects/{project_id}/layers/rectangle", response_model=Layer)
@@ -207,3 +280,104 @@ async def add_arc_layer(
     db.commit()
     db.refresh(db_layer)
     return db_layer
+
+
+@router.post("/projects/{project_id}/layers/group", response_model=Layer)
+async def add_group_layer(
+    project_id: str,
+    group: GroupCreate,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """
+    Add a new group layer to the project, moving the given layers into it.
+
+    A frozen group is rendered from a cached flattened bitmap, which is only redrawn
+    when the layers inside it change.
+    """
+    project = fetch_owned_project(db, project_id, current_user)
+
+    children = []
+    if group.children:
+        children = (
+            db.query(LayerModel)
+            .filter(LayerModel.id.in_(group.children), LayerModel.project_id == project.id)
+            .all()
+        )
+        if len(children) != len(set(group.children)):
+            raise HTTPException(status_code=404, detail="Layer not found")
+
+    properties = GroupProperties(**group.model_dump(exclude={"children"}))
+    db_layer = LayerModel(project_id=project.id, type="group", properties=properties.model_dump())
+    db.add(db_layer)
+    db.flush()
+
+    for child in children:
+        child.parent_id = db_layer.id
+
+    db.commit()
+    db.refresh(db_layer)
+    return db_layer
+
+
+@router.patch("/projects/{project_id}/groups/{group_id}", response_model=Layer)
+async def update_group_layer(
+    project_id: str,
+    group_id: str,
+    group_update: GroupUpdate,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """Rename a group, or freeze/unfreeze it."""
+    project = fetch_owned_project(db, project_id, current_user)
+
+    layer = (
+        db.query(LayerModel)
+        .filter(LayerModel.id == group_id, LayerModel.project_id == project.id, LayerModel.type == "group")
+        .first()
+    )
+    if not layer:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    layer.properties = {**layer.properties, **group_update.model_dump(exclude_unset=True)}
+
+    db.commit()
+    db.refresh(layer)
+    return layer
+
+
+@router.put("/projects/{project_id}/{layer_id}/parent", response_model=Layer)
+async def move_layer(
+    project_id: str,
+    layer_id: str,
+    parent: LayerParent,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """Move a layer into a group, or out to the top level with a null `parent_id`."""
+    project = fetch_owned_project(db, project_id, current_user)
+
+    layer = (
+        db.query(LayerModel).filter(LayerModel.id == layer_id, LayerModel.project_id == project.id).first()
+    )
+    if not layer:
+        raise HTTPException(status_code=404, detail="Layer not found")
+
+    ancestor_id = parent.parent_id
+    while ancestor_id is not None:
+        if ancestor_id == layer.id:
+            raise HTTPException(status_code=400, detail="A layer can't be moved into itself")
+        ancestor = (
+            db.query(LayerModel)
+            .filter(LayerModel.id == ancestor_id, LayerModel.project_id == project.id)
+            .first()
+        )
+        if not ancestor or (ancestor_id == parent.parent_id and ancestor.type != "group"):
+            raise HTTPException(status_code=404, detail="Group not found")
+        ancestor_id = ancestor.parent_id
+
+    layer.parent_id = parent.parent_id
+
+    db.commit()
+    db.refresh(layer)
+    return layer
@@ -1,15 +1,29 @@
-from io import BytesIO
-from typing import Annotated, Optional
+from datetime import UTC, datetime
+from typing import Annotated, Literal, Optional
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, noload
 
 from app.api.deps import get_current_user, get_db
-from app.api.utils.image import render_image
+from app.api.utils.admission import (
+    RENDER_BASE_COST,
+    canvas_render_cost,
+    render_cost,
+    renders,
+    svg_render_cost,
+)
+from app.api.utils.display_list import DisplayList, display_lists
+from app.api.utils.export import stream_project_export
+from app.api.utils.image import QUALITIES
 from app.api.utils.project import fetch_owned_project
+from app.api.utils.render import render_coalesced
+from app.api.utils.serialize import json_response, project_layer_rows, project_to_dict
+from app.api.utils.svg import stream_project_svg, svg_layer_counts
 from app.models.project import Project as ProjectModel
 from app.models.user import User as UserModel
-from app.schemas.project import Project, ProjectCreate, ProjectList, ProjectUpdate
+from app.schemas.project import Project, ProjectCreate, ProjectExport, ProjectList, ProjectUpdate
 
 router = APIRouter()
 
@@ -35,20 +49,15 @@ async def get_project(
     project_id: str,
     current_user: Annotated[UserModel, Depends(get_current_user)],
     db: Annotated[Session, Depends(get_db)],
+    accept_encoding: Annotated[str | None, Header()] = None,
 ):
     """
     Get detailed information about a specific project, including its layers.
     """
-    project = (
-        db.query(ProjectModel)
-        .filter(ProjectModel.id == project_id, ProjectModel.owner == current_user.username)
-        .first()
-    )
-
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    project = fetch_owned_project(db, project_id, current_user)
+    layers = project_layer_rows(db, project.id)
 
-    return project
+    return json_response(project_to_dict(project, layers), accept_encoding)
 
 
 @router.post("/projects", response_model=Project)
@@ -68,6 +77,81 @@ async def create_project(
     return db_project
 
 
+def _as_utc(moment: datetime) -> datetime:
+    """SQLite hands back naive timestamps, which are UTC."""
+    return moment.replace(tzinfo=UTC) if moment.tzinfo is None else moment.astimezone(UTC)
+
+
+@router.post(
+    "/projects/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/zip": {}}, "description": "A ZIP of rendered projects"}},
+)
+async def export_projects(
+    export: ProjectExport,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """
+    Render several projects (all of yours by default) into a ZIP archive, streamed back as
+    each project finishes. The archive ends with a `manifest.json` listing its contents.
+
+    Projects unchanged since `since` are skipped; pass the `X-Export-Timestamp` of an
+    earlier export to fetch only what changed after it. Projects changed within the
+    same second as `since` are exported again, since stored timestamps are only precise
+    to the second.
+    """
+    # Stored timestamps have one-second resolution, so compare whole seconds.
+    exported_at = datetime.now(UTC).replace(microsecond=0)
+
+    query = (
+        db.query(ProjectModel)
+        .options(noload(ProjectModel.layers))
+        .filter(ProjectModel.owner == current_user.username)
+    )
+    if export.project_ids is not None:
+        query = query.filter(ProjectModel.id.in_(export.project_ids))
+    projects = query.order_by(ProjectModel.id).all()
+
+    if export.project_ids is not None and len(projects) != len(set(export.project_ids)):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    skipped = []
+    if export.since is not None:
+        since = _as_utc(export.since).replace(microsecond=0)
+        changed = []
+        for project in projects:
+            if _as_utc(project.updated_at or project.created_at) >= since:
+                changed.append(project)
+            else:
+                skipped.append(project.id)
+        projects = changed
+
+    chosen_format = "jpg" if export.format == "jpeg" else export.format
+    quality = QUALITIES[export.quality]
+    await run_in_threadpool(
+        renders.charge,
+        current_user,
+        sum(canvas_render_cost(project.width, project.height, quality) for project in projects),
+    )
+
+    manifest = {
+        "exported_at": exported_at.isoformat(),
+        "since": export.since.isoformat() if export.since else None,
+        "format": chosen_format,
+        "quality": quality.name,
+        "skipped": skipped,
+    }
+    return StreamingResponse(
+        stream_project_export(projects, chosen_format, quality, manifest),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="projects.zip"',
+            "X-Export-Timestamp": exported_at.isoformat(),
+        },
+    )
+
+
 @router.delete("/projects/{project_id}", status_code=204)
 async def delete_project(
     project_id: str,
@@ -80,6 +164,7 @@ async def delete_project(
     project = fetch_owned_project(db, project_id, current_user)
     db.delete(project)
     db.commit()
+    display_lists.discard(project_id)
 
     return Response(status_code=204)
 
@@ -92,6 +177,7 @@ async def delete_project(
             "content": {
                 "image/png": {},
                 "image/jpeg": {},
+                "image/svg+xml": {},
             },
             "description": "Returns the rendered project image",
         }
@@ -102,12 +188,24 @@ async def render_project(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[UserModel, Depends(get_current_user)],
     file_extension: Optional[str] = None,
+    quality: Literal["draft", "final"] = "final",
     accept: Annotated[str | None, Header()] = None,
 ):
     """
     Render a project and return it as an image file.
     Format is determined by Accept header or file_extension query parameter.
-    Supported formats: image/png, image/jpeg
+    Supported formats: image/png, image/jpeg, image/svg+xml
+
+    SVG output is streamed from the layers without rasterizing; image layers are embedded.
+
+    `quality=draft` renders a quick preview: at reduced scale with cheaper resampling, no
+    sharpening and fast encoder settings.
+
+    Renders are charged against the user's rate limit by estimated cost (canvas size,
+    image layers and pen points; for SVG, the number of layers and images). Renders
+    served from the cache, or shared with an identical render in progress, only pay the
+    base cost. Over the limit, or with too many renders running, the response is 429
+    with a Retry-After header.
     """
     project = fetch_owned_project(db, project_id, current_user)
 
@@ -117,30 +215,38 @@ async def render_project(
             format_from_accept = "png"
         elif "image/jpeg" in accept:
             format_from_accept = "jpg"
+        elif "image/svg+xml" in accept:
+            format_from_accept = "svg"
 
     chosen_format = (file_extension or format_from_accept or "png").lower()
 
-    valid_formats = ["png", "jpg", "jpeg"]
+    valid_formats = ["png", "jpg", "jpeg", "svg"]
     if chosen_format not in valid_formats:
         raise HTTPException(
             status_code=406,
-            detail="Unsupported format. Supported formats: png, jpg, jpeg",
+            detail="Unsupported format. Supported formats: png, jpg, jpeg, svg",
+        )
+
+    if chosen_format == "svg":
+        await run_in_threadpool(
+            renders.charge, current_user, svg_render_cost(*svg_layer_counts(db, project.id))
+        )
+        return StreamingResponse(
+            stream_project_svg(project.id, project.width, project.height), media_type="image/svg+xml"
         )
 
-    sorted_layers = sorted(project.layers, key=lambda x: x.created_at)
+    if chosen_format == "jpeg":
+        chosen_format = "jpg"
 
-    img = render_image(project, sorted_layers)
+    render_quality = QUALITIES[quality]
+    await run_in_threadpool(renders.charge, current_user, RENDER_BASE_COST)
 
-    if chosen_format in ["jpg", "jpeg"]:
-        img = img.convert("RGB")
+    def charge_render(display_list: DisplayList) -> None:
+        renders.charge(current_user, render_cost(display_list, render_quality) - RENDER_BASE_COST)
 
-    img_byte_arr = BytesIO()
-    img.save(
-        img_byte_arr,
-        format="PNG" if chosen_format == "png" else "JPEG",
-        quality=95 if chosen_format in ["jpg", "jpeg"] else None,
+    img_byte_arr = await render_coalesced(
+        project, chosen_format, render_quality, slot=renders.slot, charge=charge_render
     )
-    img_byte_arr = img_byte_arr.getvalue()
 
     content_type = "image/png" if chosen_format == "png" else "image/jpeg"
 
@@ -0,0 +1,206 @@
+import base64
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Annotated
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.api.utils.admission import upload_cost, uploads
+from app.api.utils.ingest import normalize_upload
+from app.api.utils.project import add_image_layer, check_image, fetch_owned_project, upload_path
+from app.api.utils.upload_sessions import UploadSession, file_sha256, parse_checksum, upload_sessions
+from app.core.config import settings
+from app.models.user import User as UserModel
+from app.schemas.layer import Layer
+from app.schemas.upload import Upload, UploadCreate
+
+router = APIRouter()
+
+
+def _fetch_upload(project_id: str, upload_id: str, current_user: UserModel) -> UploadSession:
+    session = upload_sessions.get(upload_id)
+    if not session or session.project_id != project_id or session.owner != current_user.username:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def _progress_headers(session: UploadSession) -> dict[str, str]:
+    return {
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.length),
+        "Upload-Expires": format_datetime(session.expires_at(upload_sessions.ttl), usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+def _upload(session: UploadSession) -> Upload:
+    return Upload(
+        id=session.id,
+        project_id=session.project_id,
+        filename=session.filename,
+        length=session.length,
+        offset=session.offset,
+        expires_at=session.expires_at(upload_sessions.ttl),
+    )
+
+
+@router.post("/projects/{project_id}/uploads", response_model=Upload, status_code=201)
+async def create_upload(
+    project_id: str,
+    upload: UploadCreate,
+    request: Request,
+    response: Response,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    """
+    Start a resumable upload of an image of up to 1GB.
+
+    Send the file in chunks with `PUT /projects/{project_id}/uploads/{upload_id}`, then
+    create its image layer with `POST .../finalize`. The whole upload is charged against
+    the user's rate limit here. Sessions expire a day after their last chunk.
+    """
+    max_size = settings.UPLOAD_SESSION_MAX_SIZE
+    if upload.length > max_size:
+        raise HTTPException(
+            status_code=413, detail=f"File size exceeds maximum limit of {max_size // (1024 * 1024)}MB"
+        )
+
+    project = fetch_owned_project(db, project_id, current_user)
+    upload_path(project.id, upload.filename)  # fail early on a name clash
+    await run_in_threadpool(uploads.charge, current_user, upload_cost(upload.length))
+
+    session = upload_sessions.create(
+        current_user.username, project.id, upload.filename, upload.length, upload.sha256
+    )
+    response.headers["Location"] = str(
+        request.url_for("get_upload", project_id=project.id, upload_id=session.id)
+    )
+    response.headers.update(_progress_headers(session))
+    return _upload(session)
+
+
+@router.head("/projects/{project_id}/uploads/{upload_id}", status_code=204)
+async def head_upload(
+    project_id: str,
+    upload_id: str,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+):
+    """Get an upload's progress in the `Upload-Offset` header, tus-style."""
+    session = _fetch_upload(project_id, upload_id, current_user)
+    return Response(status_code=204, headers=_progress_headers(session))
+
+
+@router.get("/projects/{project_id}/uploads/{upload_id}", response_model=Upload)
+async def get_upload(
+    project_id: str,
+    upload_id: str,
+    response: Response,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+):
+    """Get an upload's progress."""
+    session = _fetch_upload(project_id, upload_id, current_user)
+    response.headers.update(_progress_headers(session))
+    return _upload(session)
+
+
+@router.put("/projects/{project_id}/uploads/{upload_id}", status_code=204)
+async def put_upload_chunk(
+    project_id: str,
+    upload_id: str,
+    request: Request,
+    upload_offset: Annotated[int, Header(ge=0)],
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    upload_checksum: Annotated[str | None, Header()] = None,
+):
+    """
+    Append a chunk of the file, sent as the raw request body.
+
+    `Upload-Offset` must match the upload's current offset (409 otherwise, with the
+    current offset in the header). An optional `Upload-Checksum: sha256 <base64>` is
+    checked before the chunk is accepted (460 on a mismatch). Chunks are written
+    straight to disk as they arrive.
+    """
+    session = _fetch_upload(project_id, upload_id, current_user)
+    checksum = parse_checksum(upload_checksum)
+
+    with uploads.slot():
+        await upload_sessions.write_chunk(session, upload_offset, request.stream(), checksum)
+
+    return Response(status_code=204, headers=_progress_headers(session))
+
+
+def _complete_upload(session: UploadSession) -> tuple[Path, str]:
+    """Check a finished upload and move it into place; returns its path and SHA-256."""
+    with upload_sessions.open_part(session):
+        if session.offset != session.length:
+            raise HTTPException(
+                status_code=409,
+                detail="Upload is incomplete",
+                headers={"Upload-Offset": str(session.offset)},
+            )
+
+        digest = file_sha256(session.part_path)
+        if session.sha256 and digest != session.sha256.lower():
+            upload_sessions.delete(session.id)
+            raise HTTPException(status_code=400, detail="File does not match the declared sha256")
+
+        try:
+            check_image(session.part_path)
+        except HTTPException:
+            upload_sessions.delete(session.id)
+            raise
+
+        file_path = upload_path(session.project_id, session.filename)
+        session.part_path.replace(file_path)
+        upload_sessions.delete(session.id)
+    return file_path, digest
+
+
+@router.post("/projects/{project_id}/uploads/{upload_id}/finalize", response_model=Layer)
+async def finalize_upload(
+    project_id: str,
+    upload_id: str,
+    response: Response,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+    background_tasks: BackgroundTasks,
+):
+    """
+    Finish an upload and create its image layer.
+
+    The whole file is checked against the `sha256` declared when the upload was created,
+    and its digest is returned in the `Repr-Digest` header. The upload is normalized into
+    a render-ready derivative in the background.
+    """
+    project = fetch_owned_project(db, project_id, current_user)
+    session = _fetch_upload(project.id, upload_id, current_user)
+
+    with uploads.slot():
+        file_path, digest = await run_in_threadpool(_complete_upload, session)
+
+    try:
+        layer = add_image_layer(db, project, file_path)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+    background_tasks.add_task(normalize_upload, file_path)
+
+    encoded = base64.b64encode(bytes.fromhex(digest)).decode()
+    response.headers["Repr-Digest"] = f"sha-256=:{encoded}:"
+    return layer
+
+
+@router.delete("/projects/{project_id}/uploads/{upload_id}", status_code=204)
+async def cancel_upload(
+    project_id: str,
+    upload_id: str,
+    current_user: Annotated[UserModel, Depends(get_current_user)],
+):
+    """Abandon an upload and discard what was received."""
+    session = _fetch_upload(project_id, upload_id, current_user)
+    upload_sessions.delete(session.id)
+    return Response(status_code=204)
@@ -0,0 +1,192 @@
+import asyncio
+import cProfile
+import json
+import pstats
+import sys
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import ParamSpec, TypeVar
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ulid import ULID
+
+from app.api.deps import is_admin
+from app.core.config import settings
+from app.core.database import engine
+
+PROFILE_HEADER = "x-profile-key"
+PROFILE_DIR = Path(settings.PROFILE_DIR)
+TOP_FUNCTIONS = 40
+
+# From 3.12 cProfile is built on sys.monitoring: one profiler sees every thread, and a
+# second one can't be enabled while it is active.
+PROFILER_SEES_ALL_THREADS = sys.version_info >= (3, 12)
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+_current_profile: ContextVar["RequestProfile | None"] = ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """Profiling data collected for a single flagged request."""
+
+    __slots__ = ("id", "method", "path", "statements", "worker_profilers")
+
+    def __init__(self, method: str, path: str):
+        self.id = str(ULID())
+        self.method = method
+        self.path = path
+        self.statements: list[tuple[str, float]] = []
+        self.worker_profilers: list[cProfile.Profile] = []
+
+    def stats(self, profiler: cProfile.Profile) -> pstats.Stats:
+        """The event loop profile merged with those of the worker calls it made."""
+        stats = pstats.Stats(profiler)
+        if self.worker_profilers:
+            stats.add(*self.worker_profilers)
+        return stats
+
+    def summary(self, stats: pstats.Stats, status_code: int | None, duration: float) -> dict:
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        sql_time = sum(duration for _, duration in self.statements)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "sql": {
+                "count": len(self.statements),
+                "total_ms": round(sql_time * 1000, 3),
+                "statements": [
+                    {"statement": statement, "duration_ms": round(duration * 1000, 3)}
+                    for statement, duration in self.statements
+                ],
+            },
+            "functions": [
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "total_ms": round(total * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                }
+                for (filename, line, name), (_, calls, total, cumulative, _) in functions[:TOP_FUNCTIONS]
+            ],
+        }
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(_conn, _cursor, _statement, _parameters, context, _executemany):
+    if _current_profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(_conn, _cursor, statement, _parameters, context, _executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.statements.append((statement, time.perf_counter() - started))
+
+
+def profiled(fn: Callable[P, T]) -> Callable[P, T]:
+    """
+    Profile `fn` as part of the current request when it runs on a worker thread.
+
+    Before Python 3.12 cProfile only sees the thread it is enabled on, so work offloaded
+    from a profiled request is wrapped with this to run under its own profiler, which is
+    merged into the request's profile. Returns `fn` unchanged when the request isn't
+    being profiled, or when the request's profiler already sees every thread.
+    """
+    profile = _current_profile.get()
+    if profile is None or PROFILER_SEES_ALL_THREADS:
+        return fn
+
+    @wraps(fn)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            profile.worker_profilers.append(profiler)
+
+    return wrapper
+
+
+def _profile_key(scope: Scope) -> str | None:
+    """Return the admin key a request was flagged with, if any."""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode():
+            return value.decode("latin-1")
+    return None
+
+
+def profile_path(profile_id: str, suffix: str) -> Path:
+    return PROFILE_DIR.joinpath(f"{profile_id}{suffix}")
+
+
+class ProfilingMiddleware:
+    """
+    Profile individual requests flagged with the admin key.
+
+    A request is profiled when it carries an `X-Profile-Key` header accepted by
+    `is_admin`; the key is never read from the query string, which ends up in access
+    logs. The cProfile dump and a JSON summary with the SQL statements issued are written
+    to `PROFILE_DIR`, and the response carries an `X-Profile-Id` header to fetch them
+    from the admin endpoints. Other requests only pay for the header scan.
+
+    Worker thread calls are included: on Python 3.12+ the profiler sees every thread,
+    before that only calls wrapped with `profiled` (rendering, display list compiles,
+    exports) are. Profiled requests run one at a time so their profilers don't
+    displace each other on the event loop thread, though unprofiled requests interleaved
+    on the loop can still show up.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = _profile_key(scope)
+        if key is None or not await is_admin(key):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        status_code = None
+
+        async def send_with_profile_headers(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        async with self._lock:
+            token = _current_profile.set(profile)
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_profile_headers)
+            finally:
+                profiler.disable()
+                _current_profile.reset(token)
+                duration = time.perf_counter() - started
+                stats = profile.stats(profiler)
+                PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+                stats.dump_stats(profile_path(profile.id, ".prof"))
+                profile_path(profile.id, ".json").write_text(
+                    json.dumps(profile.summary(stats, status_code, duration), indent=2)
+                )
@@ -0,0 +1,109 @@
+import math
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+from app.api.utils.display_list import DisplayList, DrawGroup, DrawLine, PasteImage
+from app.api.utils.image import FINAL, RenderQuality
+from app.core.config import settings
+from app.core.rate_limit import ConcurrencyLimiter, MemoryBucketStore, SQLiteBucketStore
+from app.models.user import User as UserModel
+
+# Render cost, in token units: a flat cost per request plus the estimated work.
+RENDER_BASE_COST = 1.0
+RENDER_COST_PER_MEGAPIXEL = 1.0
+RENDER_COST_PER_IMAGE = 2.0
+RENDER_COST_PER_PEN_POINT = 1 / 10_000
+# SVG renders aren't rasterized; they cost what is written out, and images are embedded whole.
+SVG_COST_PER_LAYER = 1 / 1_000
+
+UPLOAD_BASE_COST = 1.0
+UPLOAD_COST_PER_MB = 1.0
+
+bucket_store = (
+    SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+    if settings.RATE_LIMIT_SQLITE_PATH
+    else MemoryBucketStore()
+)
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests, please retry later",
+        headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+    )
+
+
+class EndpointClass:
+    """Admission control for one class of expensive endpoints."""
+
+    def __init__(self, name: str, rate: float, burst: float, max_concurrency: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = ConcurrencyLimiter(max_concurrency)
+
+    def charge(self, user: UserModel, cost: float) -> None:
+        """Take `cost` from the user's bucket, raising 429 if they have run out."""
+        retry_after = bucket_store.take(f"{self.name}:{user.username}", cost, self.rate, self.burst)
+        if retry_after:
+            raise too_many_requests(retry_after)
+
+    @contextmanager
+    def slot(self, wait: bool = False) -> Iterator[None]:
+        """
+        Hold one of this worker's slots for the class, raising 429 when all are busy, or
+        with `wait`, blocking until one is free. Only wait from worker threads.
+        """
+        if wait:
+            self.concurrency.acquire()
+        elif not self.concurrency.try_acquire():
+            raise too_many_requests(1)
+        try:
+            yield
+        finally:
+            self.concurrency.release()
+
+
+renders = EndpointClass(
+    "render", settings.RENDER_RATE, settings.RENDER_BURST, settings.RENDER_MAX_CONCURRENCY
+)
+uploads = EndpointClass(
+    "upload", settings.UPLOAD_RATE, settings.UPLOAD_BURST, settings.UPLOAD_MAX_CONCURRENCY
+)
+
+
+def canvas_render_cost(width: int, height: int, quality: RenderQuality = FINAL) -> float:
+    """The part of a render's cost known without loading its layers."""
+    return RENDER_BASE_COST + width * height * quality.scale**2 / 1_000_000 * RENDER_COST_PER_MEGAPIXEL
+
+
+def render_cost(display_list: DisplayList, quality: RenderQuality = FINAL) -> float:
+    """Estimate the work of rendering a display list from its canvas and commands."""
+    images = pen_points = 0
+    commands = list(display_list.commands)
+    while commands:
+        command = commands.pop()
+        if isinstance(command, PasteImage):
+            images += 1
+        elif isinstance(command, DrawLine):
+            pen_points += len(command.path)
+        elif isinstance(command, DrawGroup):
+            commands.extend(command.commands)
+
+    return (
+        canvas_render_cost(display_list.width, display_list.height, quality)
+        + images * RENDER_COST_PER_IMAGE
+        + pen_points * RENDER_COST_PER_PEN_POINT
+    )
+
+
+def svg_render_cost(layers: int, images: int) -> float:
+    """Estimate the work of streaming a project as SVG from its layer and image counts."""
+    return RENDER_BASE_COST + layers * SVG_COST_PER_LAYER + images * RENDER_COST_PER_IMAGE
+
+
+def upload_cost(size: int) -> float:
+    return UPLOAD_BASE_COST + size / (1024 * 1024) * UPLOAD_COST_PER_MB
@@ -0,0 +1,286 @@
+import shutil
+import zipfile
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO
+
+import orjson
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import Row, String, bindparam, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ulid import ULID
+
+from app.api.utils.ingest import UPLOAD_DIR
+from app.api.utils.layer_tree import cyclic_layers
+from app.api.utils.project import check_image
+from app.api.utils.zipstream import ZipStream
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.layer import Layer as LayerModel
+from app.models.project import Project as ProjectModel
+from app.schemas.layer import LAYER_PROPERTIES
+from app.schemas.project import ProjectCreate
+
+# A project archive is a ZIP of:
+#   project.json   the archive format and version, and the project's details
+#   layers.jsonl   one layer per line, in paint order, with image paths pointing into images/
+#   images/...     the uploaded files the image layers use
+ARCHIVE_FORMAT = "raspi-api.project"
+ARCHIVE_VERSION = 1
+PROJECT_ENTRY = "project.json"
+LAYERS_ENTRY = "layers.jsonl"
+IMAGES_PREFIX = "images/"
+
+CHUNK_SIZE = 64 * 1024
+LAYER_BATCH_SIZE = 5000
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+# Properties arrive as JSON and are bound as already-serialized text.
+INSERT_LAYER = insert(LayerModel.__table__).values(
+    id=bindparam("id"),
+    project_id=bindparam("project_id"),
+    type=bindparam("type"),
+    properties=bindparam("properties", type_=String),
+    created_at=bindparam("created_at"),
+)
+
+
+def _image_entry(path: str, images: dict[str, str]) -> str:
+    entry = images.get(path)
+    if entry is None:
+        # Numbered, since uploads from different projects can share a file name.
+        entry = images[path] = f"{IMAGES_PREFIX}{len(images)}_{Path(path).name}"
+    return entry
+
+
+def _layer_lines(rows: Iterable[Row], images: dict[str, str]) -> Iterator[bytes]:
+    """Serialize layers as JSON lines in chunks, collecting the images they reference."""
+    buffer = bytearray()
+    for row in rows:
+        layer = row._asdict()
+        if layer["type"] == "image":
+            properties = layer["properties"]
+            layer["properties"] = {**properties, "path": _image_entry(properties["path"], images)}
+
+        buffer += orjson.dumps(layer, option=JSON_OPTIONS)
+        buffer += b"\n"
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _file_chunks(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def stream_project_archive(project_id: str) -> Iterator[bytes]:
+    """
+    Stream a project archive, reading layers in batches and images in chunks.
+
+    Uses its own session because the response body is produced after the request's
+    session has been closed.
+    """
+    archive = ZipStream()
+    images: dict[str, str] = {}
+
+    with SessionLocal() as db:
+        project = db.get(ProjectModel, project_id)
+        header = {
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "project": {
+                "name": project.name,
+                "description": project.description,
+                "width": project.width,
+                "height": project.height,
+            },
+        }
+        yield archive.write(PROJECT_ENTRY, orjson.dumps(header, option=orjson.OPT_INDENT_2), compress=True)
+
+        rows = db.execute(
+            select(
+                LayerModel.id,
+                LayerModel.parent_id,
+                LayerModel.type,
+                LayerModel.properties,
+                LayerModel.created_at,
+            )
+            .where(LayerModel.project_id == project_id)
+            .order_by(LayerModel.created_at, LayerModel.id)
+            .execution_options(yield_per=LAYER_BATCH_SIZE)
+        )
+        yield from archive.write_chunks(LAYERS_ENTRY, _layer_lines(rows, images), compress=True)
+
+    for path, entry in images.items():
+        if Path(path).is_file():
+            yield from archive.write_chunks(entry, _file_chunks(Path(path)))
+
+    yield archive.close()
+
+
+def _ulids() -> Iterator[str]:
+    """
+    Generate ULIDs cheaply for bulk inserts: a fresh random ULID prefix for every 32**4
+    IDs, with a counter in the last four characters.
+    """
+    while True:
+        prefix = str(ULID())[:22]
+        for n in range(32**4):
+            yield (
+                prefix
+                + CROCKFORD_BASE32[n >> 15]
+                + CROCKFORD_BASE32[n >> 10 & 31]
+                + CROCKFORD_BASE32[n >> 5 & 31]
+                + CROCKFORD_BASE32[n & 31]
+            )
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=400, detail=detail)
+
+
+def _store_images(archive: zipfile.ZipFile, project_id: str, stored: list[Path]) -> dict[str, str]:
+    """
+    Copy the archive's images into the upload directory, checking each like a direct
+    upload (400 or 413); returns their new paths by entry name.
+    """
+    images = {}
+    for info in archive.infolist():
+        if info.is_dir() or not info.filename.startswith(IMAGES_PREFIX):
+            continue
+
+        # Numbered, since entries in different directories can share a file name.
+        path = UPLOAD_DIR / f"{project_id}_{len(stored)}_{PurePosixPath(info.filename).name}"
+        stored.append(path)
+        with archive.open(info) as source, path.open("wb") as target:
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+        try:
+            check_image(path)
+        except HTTPException as exc:
+            raise HTTPException(
+                status_code=exc.status_code, detail=f"{exc.detail}: {info.filename}"
+            ) from exc
+        images[info.filename] = str(path)
+    return images
+
+
+def _insert_layers(db: Session, archive: zipfile.ZipFile, project_id: str, images: dict[str, str]) -> None:
+    """
+    Bulk insert the archive's layers under new IDs, in batches of executemany INSERTs.
+
+    Parents are linked afterwards with a bulk UPDATE, since groups usually come after the
+    layers they contain, once it is checked that every parent is a group in the archive
+    and no group contains itself. Bulk statements skip the per-layer mapper events.
+    """
+    # Handed out in line order, so layers keep their (created_at, id) order.
+    ulids = _ulids()
+    new_ids: dict[str, str] = {}
+    groups, parent_of, batch = set(), {}, []
+    now = datetime.now(UTC)
+
+    with archive.open(LAYERS_ENTRY) as lines:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                layer = orjson.loads(line)
+                layer_type = layer["type"]
+                properties = LAYER_PROPERTIES[layer_type].model_validate(layer["properties"]).model_dump()
+                created_at = datetime.fromisoformat(layer["created_at"]) if layer.get("created_at") else now
+            except (orjson.JSONDecodeError, KeyError, TypeError, ValueError, ValidationError) as exc:
+                raise _invalid(f"Invalid layer on line {number} of {LAYERS_ENTRY}") from exc
+
+            if layer_type == "image":
+                path = properties["path"]
+                properties["path"] = images.get(path) or str(
+                    UPLOAD_DIR / f"{project_id}_{PurePosixPath(path).name}"
+                )
+
+            layer_id = new_ids.setdefault(layer["id"], next(ulids))
+            if layer_type == "group":
+                groups.add(layer["id"])
+            if layer.get("parent_id"):
+                parent_of[layer["id"]] = layer["parent_id"]
+
+            batch.append(
+                {
+                    "id": layer_id,
+                    "project_id": project_id,
+                    "type": layer_type,
+                    "properties": orjson.dumps(properties).decode(),
+                    "created_at": created_at,
+                }
+            )
+            if len(batch) >= LAYER_BATCH_SIZE:
+                db.execute(INSERT_LAYER, batch)
+                batch = []
+
+    if batch:
+        db.execute(INSERT_LAYER, batch)
+
+    if not new_ids.keys() >= set(parent_of.values()):
+        raise _invalid("Layers refer to groups missing from the archive")
+    if not groups.issuperset(parent_of.values()):
+        raise _invalid("Layers can only be nested in groups")
+    if cyclic_layers(parent_of):
+        raise _invalid("Groups in the archive contain themselves")
+
+    parents = [
+        {"id": new_ids[old_id], "parent_id": new_ids[parent_id]} for old_id, parent_id in parent_of.items()
+    ]
+    for start in range(0, len(parents), LAYER_BATCH_SIZE):
+        db.execute(update(LayerModel), parents[start : start + LAYER_BATCH_SIZE])
+
+
+def import_project_archive(db: Session, source: BinaryIO, owner: str) -> tuple[ProjectModel, list[Path]]:
+    """
+    Create a project from an archive in a single transaction.
+
+    Returns the project and the image files stored for it. If anything fails the
+    transaction is rolled back and the stored files are removed.
+    """
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile as exc:
+        raise _invalid("Not a project archive") from exc
+
+    with archive:
+        if sum(info.file_size for info in archive.infolist()) > settings.ARCHIVE_MAX_SIZE:
+            raise HTTPException(status_code=413, detail="Archive contents exceed the maximum size")
+
+        try:
+            header = orjson.loads(archive.read(PROJECT_ENTRY))
+            if header["format"] != ARCHIVE_FORMAT:
+                raise _invalid("Not a project archive")
+            if header["version"] != ARCHIVE_VERSION:
+                raise _invalid(f"Unsupported archive version {header['version']}")
+            details = ProjectCreate.model_validate(header["project"])
+        except (KeyError, TypeError, orjson.JSONDecodeError, ValidationError) as exc:
+            raise _invalid(f"Invalid {PROJECT_ENTRY}") from exc
+
+        project = ProjectModel(**details.model_dump(), owner=owner)
+        db.add(project)
+        db.flush()
+
+        stored: list[Path] = []
+        try:
+            images = _store_images(archive, project.id, stored)
+            _insert_layers(db, archive, project.id, images)
+            db.commit()
+        except BaseException as exc:
+            db.rollback()
+            for path in stored:
+                path.unlink(missing_ok=True)
+            if isinstance(exc, IntegrityError):
+                raise _invalid("Duplicate layer IDs in the archive") from exc
+            raise
+
+    return project, stored
@@ -0,0 +1,382 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import orjson
+from PIL import Image, ImageColor, ImageDraw, ImagePath
+
+from app.api.utils.image import RenderQuality, apply_image_adjustments
+from app.api.utils.ingest import open_render_ready
+from app.api.utils.layer_tree import LayerNode, build_layer_tree
+from app.api.utils.pixel_store import derivative_path, read_size
+from app.core.config import settings
+from app.models.layer import Layer
+from app.models.project import Project
+
+ADJUSTMENTS = ("contrast", "brightness", "sharpness")
+# Adjustments computed per pixel, which give the same result on any band of rows.
+PIXELWISE_ADJUSTMENTS = {"brightness"}
+
+
+def _ink(color: str) -> tuple[int, int, int, int]:
+    return ImageColor.getcolor(color, "RGBA")
+
+
+def _scaled(box: tuple, scale: float) -> tuple:
+    return box if scale == 1.0 else tuple(coord * scale for coord in box)
+
+
+def _scaled_width(width: int, scale: float) -> int:
+    return width if scale == 1.0 else max(round(width * scale), 1)
+
+
+def _circle_bbox(props: dict) -> tuple[float, float, float, float]:
+    return (
+        props["x"] - props["radius"],
+        props["y"] - props["radius"],
+        props["x"] + props["radius"],
+        props["y"] + props["radius"],
+    )
+
+
+class DrawRectangle:
+    __slots__ = ("bbox", "fill")
+
+    def __init__(self, props: dict):
+        self.bbox = (props["x"], props["y"], props["x"] + props["width"], props["y"] + props["height"])
+        self.fill = _ink(props["color"])
+
+    def execute(self, img: Image.Image, draw: ImageDraw.ImageDraw, quality: RenderQuality) -> None:
+        draw.rectangle(_scaled(self.bbox, quality.scale), fill=self.fill, width=0)
+
+
+class DrawEllipse:
+    __slots__ = ("bbox", "fill")
+
+    def __init__(self, props: dict):
+        self.bbox = _circle_bbox(props)
+        self.fill = _ink(props["color"])
+
+    def execute(self, img: Image.Image, draw: ImageDraw.ImageDraw, quality: RenderQuality) -> None:
+        draw.ellipse(_scaled(self.bbox, quality.scale), fill=self.fill, width=0)
+
+
+class DrawArc:
+    __slots__ = ("bbox", "end", "fill", "start", "width")
+
+    def __init__(self, props: dict):
+        self.bbox = _circle_bbox(props)
+        self.start = props["start_angle"]
+        self.end = props["end_angle"]
+        self.fill = _ink(props["color"])
+        self.width = int(props["stroke_width"])
+
+    def execute(self, img: Image.Image, draw: ImageDraw.ImageDraw, quality: RenderQuality) -> None:
+        draw.arc(
+            _scaled(self.bbox, quality.scale),
+            start=self.start,
+            end=self.end,
+            fill=self.fill,
+            width=_scaled_width(self.width, quality.scale),
+        )
+
+
+class DrawLine:
+    """A pen stroke, with its points packed into a Pillow path once at compile time."""
+
+    __slots__ = ("bbox", "fill", "path", "width")
+
+    def __init__(self, props: dict):
+        points = props["points"]
+        self.path = ImagePath.Path([coord for p in points for coord in (p["x"], p["y"])])
+        self.fill = _ink(props["color"])
+        self.width = int(props["stroke_width"])
+
+        x0, y0, x1, y1 = self.path.getbbox()
+        margin = self.width / 2
+        self.bbox = (x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+
+    def execute(self, img: Image.Image, draw: ImageDraw.ImageDraw, quality: RenderQuality) -> None:
+        path = self.path
+        if quality.scale != 1.0:
+            path = ImagePath.Path(path)
+            path.transform((quality.scale, 0, 0, 0, quality.scale, 0))
+        draw.line(path, fill=self.fill, width=_scaled_width(self.width, quality.scale))
+
+
+def _composite(img: Image.Image, layer_img: Image.Image, position: tuple[int, int]) -> None:
+    """Alpha-composite `layer_img` over `img` at `position`, clipped to the canvas."""
+    x, y = position
+    left, top = max(-x, 0), max(-y, 0)
+    right, bottom = min(layer_img.width, img.width - x), min(layer_img.height, img.height - y)
+    if left >= right or top >= bottom:
+        return
+    if layer_img.mode != "RGBA":
+        layer_img = layer_img.convert("RGBA")
+    img.alpha_composite(layer_img, (x + left, y + top), (left, top, right, bottom))
+
+
+class PasteImage:
+    """An image layer; `bbox` is None when the size is only known once the file is opened."""
+
+    __slots__ = ("adjustments", "bbox", "path", "position", "size")
+
+    def __init__(self, props: dict):
+        self.path = props["path"]
+        self.position = (int(props["x"]), int(props["y"]))
+        self.adjustments = {name: props[name] for name in ADJUSTMENTS if props.get(name, 1.0) != 1.0}
+
+        self.size = None
+        self.bbox = None
+        if props.get("width") and props.get("height"):
+            self.size = (int(props["width"]), int(props["height"]))
+            self.bbox = (*self.position, self.position[0] + self.size[0], self.position[1] + self.size[1])
+
+    def execute(self, img: Image.Image, draw: ImageDraw.ImageDraw, quality: RenderQuality) -> None:
+        scale = quality.scale
+        adjusted = self.adjustments.keys() if quality.sharpen else self.adjustments.keys() - {"sharpness"}
+
+        position = self.position
+        rows = None
+        if not self.size and adjusted <= PIXELWISE_ADJUSTMENTS:
+            # Only read the rows that land on the canvas.
+            rows = (-position[1], math.ceil(img.height / scale) - position[1])
+
+        try:
+            layer_img = open_render_ready(self.path, rows)
+            if layer_img is None:
+                return
+            if rows is not None:
+                position = (position[0], position[1] + max(rows[0], 0))
+
+            size = self.size or layer_img.size
+            if scale != 1.0:
+                # Scale down before adjusting, so the enhancers run on fewer pixels.
+                size = (max(round(size[0] * scale), 1), max(round(size[1] * scale), 1))
+                position = (round(position[0] * scale), round(position[1] * scale))
+                layer_img = layer_img.resize(size, quality.resample, reducing_gap=quality.reducing_gap)
+
+            if adjusted:
+                layer_img = apply_image_adjustments(layer_img, self.adjustments, quality.sharpen)
+
+            if layer_img.size != size:
+                layer_img = layer_img.resize(size, quality.resample, reducing_gap=quality.reducing_gap)
+
+            _composite(img, layer_img, position)
+        except (OSError, Image.DecompressionBombError):
+            return
+
+
+COMMANDS = {
+    "rectangle": DrawRectangle,
+    "circle": DrawEllipse,
+    "arc": DrawArc,
+    "pen": DrawLine,
+    "image": PasteImage,
+}
+
+
+def compile_layer(layer_type: str, props: dict):
+    """Compile a single layer into a draw command, or None if it draws nothing."""
+    if layer_type == "pen" and len(props["points"]) < 2:
+        return None
+
+    command = COMMANDS.get(layer_type)
+    return command(props) if command else None
+
+
+def layer_bbox(layer_type: str, props: dict) -> tuple[int, int, int, int] | None:
+    """
+    The canvas area a layer paints, rounded out to whole pixels. None when it can't be
+    told cheaply: for groups, and for images drawn at their natural size that have no
+    derivative yet. Image sizes come from the derivative header, never from decoding.
+    """
+    command = compile_layer(layer_type, props)
+    if command is None:
+        return None
+
+    bbox = command.bbox
+    if bbox is None:
+        # An image drawn at its natural size.
+        size = read_size(derivative_path(command.path))
+        if size is None:
+            return None
+        bbox = (*command.position, command.position[0] + size[0], command.position[1] + size[1])
+    return (math.floor(bbox[0]), math.floor(bbox[1]), math.ceil(bbox[2]), math.ceil(bbox[3]))
+
+
+def _union_bbox(commands: list) -> tuple[float, float, float, float] | None:
+    if not commands or any(command.bbox is None for command in commands):
+        return None
+    boxes = [command.bbox for command in commands]
+    return (
+        min(box[0] for box in boxes),
+        min(box[1] for box in boxes),
+        max(box[2] for box in boxes),
+        max(box[3] for box in boxes),
+    )
+
+
+class DrawGroup:
+    """
+    A group layer's children, in paint order.
+
+    `key` digests the children's content (including nested groups), so it changes exactly
+    when the group's pixels may. A frozen group is flattened once per key and canvas size,
+    then composited over the layers below it as a single bitmap. Images are alpha
+    composited and shape colors are opaque, so this gives the same pixels as drawing the
+    children one by one.
+    """
+
+    __slots__ = ("bbox", "commands", "frozen", "key")
+
+    def __init__(self, node: LayerNode):
+        self.frozen = bool(node.properties.get("frozen"))
+        self.commands = []
+
+        digest = hashlib.blake2b(digest_size=16)
+        for child in node.children:
+            command = compile_node(child)
+            digest.update(
+                orjson.dumps([child.id, child.type, child.properties], option=orjson.OPT_SORT_KEYS)
+            )
+            if isinstance(command, DrawGroup):
+                digest.update(command.key)
+            if command is not None:
+                self.commands.append(command)
+
+        self.key = digest.digest()
+        self.bbox = _union_bbox(self.commands)
+
+    def flatten(
+        self, size: tuple[int, int], quality: RenderQuality
+    ) -> tuple[Image.Image, tuple[int, int]] | None:
+        """Rasterize the children onto a transparent canvas, cropped to what they cover."""
+        canvas = Image.new("RGBA", size, color=(0, 0, 0, 0))
+        draw = ImageDraw.Draw(canvas)
+        for command in self.commands:
+            command.execute(canvas, draw, quality)
+
+        bbox = canvas.getbbox()
+        if bbox is None:
+            return None
+        return canvas.crop(bbox), bbox[:2]
+
+    def execute(self, img: Image.Image, draw: ImageDraw.ImageDraw, quality: RenderQuality) -> None:
+        if not self.frozen:
+            for command in self.commands:
+                command.execute(img, draw, quality)
+            return
+
+        flattened = group_bitmaps.get(self, img.size, quality)
+        if flattened is not None:
+            bitmap, offset = flattened
+            img.alpha_composite(bitmap, offset)
+
+
+def compile_node(node: LayerNode):
+    if node.type == "group":
+        return DrawGroup(node)
+    return compile_layer(node.type, node.properties)
+
+
+class GroupBitmapCache:
+    """
+    Flattened bitmaps of frozen groups, least recently used first out once their pixels
+    exceed `max_bytes`.
+
+    Entries are keyed by the group's content key, so editing layers outside a group (or in
+    another group) reuses its bitmap, and only groups whose children changed are redrawn.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[Image.Image, tuple[int, int]] | None] = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _size(flattened: tuple[Image.Image, tuple[int, int]] | None) -> int:
+        return flattened[0].width * flattened[0].height * 4 if flattened else 0
+
+    def get(
+        self, group: DrawGroup, size: tuple[int, int], quality: RenderQuality
+    ) -> tuple[Image.Image, tuple[int, int]] | None:
+        key = (group.key, size, quality.name)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        flattened = group.flatten(size, quality)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = flattened
+                self._bytes += self._size(flattened)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._size(evicted)
+        return flattened
+
+
+group_bitmaps = GroupBitmapCache(settings.GROUP_BITMAP_CACHE_BYTES)
+
+
+class DisplayList:
+    """The draw commands for one project revision, in paint order."""
+
+    __slots__ = ("commands", "height", "revision", "width")
+
+    def __init__(self, width: int, height: int, revision: int, commands: list):
+        self.width = width
+        self.height = height
+        self.revision = revision
+        self.commands = commands
+
+
+def compile_display_list(project: Project, layers: list[Layer]) -> DisplayList:
+    commands = []
+    for node in build_layer_tree(layers):
+        command = compile_node(node)
+        if command is not None:
+            commands.append(command)
+    return DisplayList(project.width, project.height, project.revision, commands)
+
+
+class DisplayListCache:
+    """
+    Compiled display lists for the most recently rendered projects.
+
+    Entries are keyed by project id and only reused while the project revision matches,
+    so any layer or project change invalidates them. A hit skips loading the layers.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, DisplayList] = OrderedDict()
+
+    def get(self, project: Project) -> DisplayList:
+        with self._lock:
+            display_list = self._entries.get(project.id)
+            if display_list is not None and display_list.revision == project.revision:
+                self._entries.move_to_end(project.id)
+                return display_list
+
+        display_list = compile_display_list(project, project.layers)
+
+        with self._lock:
+            self._entries[project.id] = display_list
+            self._entries.move_to_end(project.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return display_list
+
+    def discard(self, project_id: str) -> None:
+        with self._lock:
+            self._entries.pop(project_id, None)
+
+
+display_lists = DisplayListCache(settings.DISPLAY_LIST_CACHE_SIZE)
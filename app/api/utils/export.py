@@ -0,0 +1,112 @@
+import logging
+import re
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+
+import orjson
+
+from app.api.profiling import profiled
+from app.api.utils.admission import renders
+from app.api.utils.image import RenderQuality
+from app.api.utils.render import render_cached
+from app.api.utils.svg import stream_project_svg
+from app.api.utils.zipstream import ZipStream
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.project import Project as ProjectModel
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Shared by all exports in the worker; each export keeps at most this many renders queued.
+_export_pool = ThreadPoolExecutor(max_workers=settings.EXPORT_WORKERS, thread_name_prefix="export")
+
+
+def export_filename(project: ProjectModel, chosen_format: str) -> str:
+    slug = re.sub(r"[^\w.-]+", "_", project.name or "").strip("._") or "project"
+    return f"{slug}-{project.id}.{chosen_format}"
+
+
+def _render_project(
+    project_id: str, chosen_format: str, quality: RenderQuality
+) -> tuple[int, bytes] | None:
+    """
+    Render one project on a pool thread, with its own session; None if it's gone. Waits
+    for a render slot, so exports share the worker's render concurrency with requests.
+    """
+    with SessionLocal() as db:
+        project = db.get(ProjectModel, project_id)
+        if project is None:
+            return None
+        return project.revision, render_cached(
+            project, chosen_format, quality, slot=partial(renders.slot, wait=True)
+        )
+
+
+def stream_project_export(
+    projects: list[ProjectModel], chosen_format: str, quality: RenderQuality, manifest: dict
+) -> Iterator[bytes]:
+    """
+    Stream a ZIP of rendered projects, ending with a `manifest.json` of what it contains.
+
+    Raster renders run on a pool of `EXPORT_WORKERS` threads shared by all exports and
+    are added in the order they finish, with no more renders in flight per export than
+    workers, so memory use stays flat however many projects are exported. SVGs are
+    streamed straight into the archive.
+    `projects` are detached instances; each render loads its project in its own session.
+    """
+    archive = ZipStream()
+    names = {project.id: export_filename(project, chosen_format) for project in projects}
+    exported, failed = [], []
+
+    def add(project: ProjectModel, revision: int) -> None:
+        exported.append(
+            {"id": project.id, "name": project.name, "revision": revision, "file": names[project.id]}
+        )
+
+    if chosen_format == "svg":
+        for project in projects:
+            yield from archive.write_chunks(
+                names[project.id],
+                stream_project_svg(project.id, project.width, project.height),
+                compress=True,
+            )
+            add(project, project.revision)
+    else:
+        queued = iter(projects)
+        pending: dict[Future, ProjectModel] = {}
+        try:
+            while True:
+                while len(pending) < settings.EXPORT_WORKERS and (project := next(queued, None)):
+                    future = _export_pool.submit(
+                        profiled(_render_project), project.id, chosen_format, quality
+                    )
+                    pending[future] = project
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    project = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        logger.exception("Could not export project %s", project.id)
+                        result = None
+                    if result is None:
+                        failed.append(project.id)
+                        continue
+
+                    revision, content = result
+                    yield archive.write(names[project.id], content)
+                    add(project, revision)
+        finally:
+            # Don't leave renders queued for a client that went away.
+            for future in pending:
+                future.cancel()
+
+    manifest = {**manifest, "projects": exported, "failed": failed}
+    yield archive.write(MANIFEST_NAME, orjson.dumps(manifest, option=orjson.OPT_INDENT_2), compress=True)
+    yield archive.close()
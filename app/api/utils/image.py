@@ -1,10 +1,62 @@
-from PIL import Image, ImageDraw, ImageEnhance
-
-from app.models.layer import Layer
-from app.models.project import Project
+from io import BytesIO
+from typing import TYPE_CHECKING
 
+from PIL import Image, ImageDraw, ImageEnhance
 
-def apply_image_adjustments(image: Image.Image, properties: dict) -> Image.Image:
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.api.utils.display_list import DisplayList
+
+
+class RenderQuality:
+    """
+    How much work a render spends on fidelity: canvas scale, resampling filter, whether
+    sharpness is applied, and the encoder options for each output format.
+    """
+
+    __slots__ = ("encoders", "name", "reducing_gap", "resample", "scale", "sharpen")
+
+    def __init__(
+        self,
+        name: str,
+        scale: float,
+        resample: Image.Resampling,
+        reducing_gap: float | None,
+        sharpen: bool,
+        encoders: dict,
+    ):
+        self.name = name
+        self.scale = scale
+        self.resample = resample
+        # Shrink by whole factors with Image.reduce first, then resample the remainder.
+        self.reducing_gap = reducing_gap
+        self.sharpen = sharpen
+        # Pillow format name and save() options for each output format; part of render cache keys.
+        self.encoders = encoders
+
+
+FINAL = RenderQuality(
+    "final",
+    scale=1.0,
+    resample=Image.Resampling.LANCZOS,
+    reducing_gap=None,
+    sharpen=True,
+    encoders={"png": ("PNG", {}), "jpg": ("JPEG", {"quality": 95})},
+)
+# For interactive previews: rendered at reduced scale and upsampled, without sharpening.
+DRAFT = RenderQuality(
+    "draft",
+    scale=settings.DRAFT_RENDER_SCALE,
+    resample=Image.Resampling.BILINEAR,
+    reducing_gap=2.0,
+    sharpen=False,
+    encoders={"png": ("PNG", {"compress_level": 1}), "jpg": ("JPEG", {"quality": 75})},
+)
+QUALITIES = {quality.name: quality for quality in (FINAL, DRAFT)}
+
+
+def apply_image_adjustments(image: Image.Image, properties: dict, sharpen: bool = True) -> Image.Image:
     """Apply image adjustments based on layer properties."""
     if properties.get("contrast", 1.0) != 1.0:
         image = ImageEnhance.Contrast(image).enhance(properties["contrast"])
@@ -12,70 +64,38 @@ def apply_image_adjustments(image: Image.Image, properties: dict) -> Image.Image
     if properties.get("brightness", 1.0) != 1.0:
         image = ImageEnhance.Brightness(image).enhance(properties["brightness"])
 
-    if properties.get("sharpness", 1.0) != 1.0:
+    if sharpen and properties.get("sharpness", 1.0) != 1.0:
         image = ImageEnhance.Sharpness(image).enhance(properties["sharpness"])
 
     return image
 
 
-def render_image(project: Project, layers: list[Layer]) -> None:
-    img = Image.new("RGBA", (project.width, project.height), color=(255, 255, 255, 0))
+def render_image(display_list: "DisplayList", quality: RenderQuality = FINAL) -> Image.Image:
+    """
+    Execute a compiled display list onto a transparent canvas.
+
+    Below full scale, the canvas is drawn smaller and upsampled to the project size.
+    """
+    size = (display_list.width, display_list.height)
+    scaled_size = tuple(max(round(side * quality.scale), 1) for side in size)
+
+    img = Image.new("RGBA", scaled_size, color=(255, 255, 255, 0))
     draw = ImageDraw.Draw(img)
 
-    for layer in layers:
-        props = layer.properties
-
-        if layer.type == "rectangle":
-            draw.rectangle(
-                [
-                    (props["x"], props["y"]),
-                    (props["x"] + props["width"], props["y"] + props["height"]),
-                ],
-                fill=props["color"],
-                width=0,
-            )
-
-        elif layer.type == "circle":
-            draw.ellipse(
-                [
-                    (props["x"] - props["radius"], props["y"] - props["radius"]),
-                    (props["x"] + props["radius"], props["y"] + props["radius"]),
-                ],
-                fill=props["color"],
-                width=0,
-            )
-
-        elif layer.type == "pen":
-            points = [(p["x"], p["y"]) for p in props["points"]]
-            if len(points) > 1:
-                draw.line(points, fill=props["color"], width=int(props["stroke_width"]))
-
-        elif layer.type == "image":
-            try:
-                layer_img = Image.open(props["path"])
-                layer_img = apply_image_adjustments(layer_img, props)
-
-                if props.get("width") and props.get("height"):
-                    layer_img = layer_img.resize(
-                        (int(props["width"]), int(props["height"])),
-                        Image.Resampling.LANCZOS,
-                    )
-
-                img.paste(layer_img, (int(props["x"]), int(props["y"])))
-            except (OSError, FileNotFoundError):
-                continue
-
-        elif layer.type == "arc":
-            bbox = [
-                (props["x"] - props["radius"], props["y"] - props["radius"]),
-                (props["x"] + props["radius"], props["y"] + props["radius"]),
-            ]
-            draw.arc(
-                bbox,
-                start=props["start_angle"],
-                end=props["end_angle"],
-                fill=props["color"],
-                width=int(props["stroke_width"]),
-            )
+    for command in display_list.commands:
+        command.execute(img, draw, quality)
 
+    if scaled_size != size:
+        img = img.resize(size, quality.resample)
     return img
+
+
+def encode_image(img: Image.Image, chosen_format: str, quality: RenderQuality = FINAL) -> bytes:
+    """Encode a rendered image as PNG or JPEG."""
+    pil_format, options = quality.encoders[chosen_format]
+    if pil_format == "JPEG":
+        img = img.convert("RGB")
+
+    buffer = BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
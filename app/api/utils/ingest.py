@@ -0,0 +1,132 @@
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageCms, ImageOps
+from sqlalchemy import func, select
+
+from app.api.utils.pixel_store import derivative_path, pixel_store, write_raw
+from app.core.database import SessionLocal
+from app.models.layer import Layer as LayerModel
+from app.models.project import Project as ProjectModel
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path("uploads")
+
+SRGB_PROFILE = ImageCms.createProfile("sRGB")
+HIGH_BIT_DEPTH_MODES = ("I", "I;16", "I;16B", "I;16L", "I;16N")
+
+# Uploads found without a derivative at render time are normalized here, once per process.
+_normalizer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="normalize")
+_normalize_lock = threading.Lock()
+_normalize_scheduled: set[str] = set()
+
+
+def _to_srgb(image: Image.Image) -> Image.Image:
+    """Convert ICC-tagged images to sRGB, leaving untagged ones alone."""
+    icc_profile = image.info.get("icc_profile")
+    if not icc_profile:
+        return image
+
+    if image.mode not in ("RGB", "RGBA", "CMYK", "L"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    output_mode = "RGBA" if image.mode == "RGBA" else "RGB"
+    try:
+        source_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        return ImageCms.profileToProfile(image, source_profile, SRGB_PROFILE, outputMode=output_mode)
+    except (ImageCms.PyCMSError, OSError):
+        logger.warning("Ignoring unusable ICC profile")
+        return image
+
+
+def normalize_image(image: Image.Image) -> Image.Image:
+    """Bring an uploaded image into the renderer's native format: upright, sRGB, 8-bit RGBA."""
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in HIGH_BIT_DEPTH_MODES:
+        image = image.convert("I").point(lambda value: value * (1 / 256)).convert("L")
+
+    image = _to_srgb(image)
+    return image if image.mode == "RGBA" else image.convert("RGBA")
+
+
+def normalize_upload(source: str | Path) -> Path | None:
+    """
+    Write the render-ready derivative of an uploaded file.
+
+    Runs as a background task after the upload is stored; until it finishes (or if it
+    fails) renders fall back to decoding the original.
+    """
+    try:
+        with Image.open(source) as image:
+            return write_raw(derivative_path(source), normalize_image(image))
+    except FileNotFoundError:
+        logger.warning("Upload %s is missing", source)
+        return None
+    except (OSError, Image.DecompressionBombError):
+        logger.exception("Could not normalize upload %s", source)
+        return None
+
+
+def schedule_normalize(source: str | Path) -> None:
+    """
+    Normalize an upload on a background thread. Each source is only tried once per
+    process, so a missing or broken file isn't retried (and logged) on every render.
+    """
+    with _normalize_lock:
+        if str(source) in _normalize_scheduled:
+            return
+        _normalize_scheduled.add(str(source))
+    _normalizer.submit(normalize_upload, source)
+
+
+def open_render_ready(source: str | Path, rows: tuple[int, int] | None = None) -> Image.Image | None:
+    """
+    Open an image layer's pixels from the pixel store, optionally just a band of rows.
+
+    Uploads without a derivative yet (older uploads, or normalization still pending) are
+    decoded and normalized from the original, so they render the same either way, and
+    normalization is scheduled in the background for the next render. Returns None when
+    `rows` lies entirely outside the image; raises OSError when the original can't be
+    opened either.
+    """
+    try:
+        return pixel_store.open(derivative_path(source), rows)
+    except FileNotFoundError:
+        schedule_normalize(source)
+
+    with Image.open(source) as original:
+        image = normalize_image(original)
+    if rows is None:
+        return image
+    top, bottom = max(rows[0], 0), min(rows[1], image.height)
+    return image.crop((0, top, image.width, bottom)) if top < bottom else None
+
+
+def warm_recent_images(limit: int) -> int:
+    """
+    Map the derivatives of the most recently edited projects' images into the pixel store
+    and start reading them into the page cache, so the first renders after a restart
+    don't wait on the disk. Returns how many were mapped.
+    """
+    with SessionLocal() as db:
+        paths = db.scalars(
+            select(LayerModel.properties["path"].as_string())
+            .join(ProjectModel, LayerModel.project_id == ProjectModel.id)
+            .where(LayerModel.type == "image")
+            .order_by(func.coalesce(ProjectModel.updated_at, ProjectModel.created_at).desc())
+            .limit(limit)
+        ).all()
+
+    warmed = 0
+    for path in dict.fromkeys(paths):
+        try:
+            pixel_store.prefetch(derivative_path(path))
+        except OSError:
+            continue
+        warmed += 1
+    return warmed
@@ -0,0 +1,78 @@
+from typing import Any
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.api.utils.display_list import layer_bbox
+from app.schemas.layer import LAYER_PROPERTIES
+
+MERGE_PATCH_TYPE = "application/merge-patch+json"
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """Apply an RFC 7396 JSON merge patch: objects merge recursively, and null removes a member."""
+    if not isinstance(patch, dict):
+        return patch
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def layer_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def etag_matches(if_match: str | None, version: int) -> bool:
+    """Whether an If-Match header allows changing a layer at `version`; no header always does."""
+    if if_match is None:
+        return True
+    tags = {tag.strip() for tag in if_match.split(",")}
+    return "*" in tags or layer_etag(version) in tags
+
+
+def patched_properties(layer_type: str, properties: dict, patch: dict) -> dict:
+    """
+    Merge a patch into a layer's properties, validated against the schema for its type.
+    Members the type doesn't have are rejected rather than silently dropped, unless the
+    patch only removes them.
+    """
+    schema = LAYER_PROPERTIES[layer_type]
+    unknown = [
+        {
+            "type": "extra_forbidden",
+            "loc": ("body", key),
+            "msg": "Extra inputs are not permitted",
+            "input": value,
+        }
+        for key, value in patch.items()
+        if key not in schema.model_fields and value is not None
+    ]
+    if unknown:
+        raise RequestValidationError(unknown)
+
+    merged = merge_patch(properties, patch)
+    try:
+        validated = schema.model_validate(merged).model_dump()
+    except ValidationError as exc:
+        errors = exc.errors(include_url=False)
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in errors]
+        ) from exc
+
+    if layer_type == "image" and validated["path"] != properties.get("path"):
+        raise HTTPException(status_code=400, detail="An image layer's path can't be changed")
+    return validated
+
+
+def changed_bbox(layer_type: str, before: dict, after: dict) -> tuple[int, int, int, int] | None:
+    """The canvas area a change to a layer's properties repaints, or None if it can't be told."""
+    old, new = layer_bbox(layer_type, before), layer_bbox(layer_type, after)
+    if old is None or new is None:
+        return None
+    return (min(old[0], new[0]), min(old[1], new[1]), max(old[2], new[2]), max(old[3], new[3]))
@@ -0,0 +1,65 @@
+from collections.abc import Iterable
+
+
+class LayerNode:
+    __slots__ = ("children", "created_at", "id", "paint_key", "properties", "type")
+
+    def __init__(self, layer):
+        self.id = layer.id
+        self.type = layer.type
+        self.properties = layer.properties
+        self.created_at = layer.created_at
+        # created_at only has one-second resolution; ties go to the time-ordered ULID.
+        self.paint_key = (layer.created_at, layer.id)
+        self.children: list[LayerNode] = []
+
+
+def _sort(nodes: list[LayerNode]) -> None:
+    for node in nodes:
+        if node.children:
+            _sort(node.children)
+            node.paint_key = node.children[0].paint_key
+    nodes.sort(key=lambda node: node.paint_key)
+
+
+def cyclic_layers(parent_of: dict[str, str]) -> set[str]:
+    """The layers that are their own ancestors, given each nested layer's parent."""
+    cyclic: set[str] = set()
+    resolved: set[str] = set()
+    for start in parent_of:
+        path: dict[str, None] = {}
+        current = start
+        while current in parent_of and current not in resolved and current not in path:
+            path[current] = None
+            current = parent_of[current]
+        if current in path:
+            chain = list(path)
+            cyclic.update(chain[chain.index(current) :])
+        resolved.update(path)
+    return cyclic
+
+
+def build_layer_tree(layers: Iterable) -> list[LayerNode]:
+    """
+    Arrange layers (ORM objects or rows) into their groups, each level in paint order.
+
+    Layers paint in creation order, then ID order. A group paints where its earliest
+    layer would, so grouping existing layers doesn't lift them above layers added later. Layers whose
+    group no longer exists, and layers in a parent cycle, are treated as top-level.
+    """
+    nodes, parent_ids = {}, {}
+    for layer in layers:
+        nodes[layer.id] = LayerNode(layer)
+        parent_ids[layer.id] = layer.parent_id
+
+    parent_of = {layer_id: parent_id for layer_id, parent_id in parent_ids.items() if parent_id in nodes}
+    for layer_id in cyclic_layers(parent_of):
+        del parent_of[layer_id]
+
+    roots = []
+    for node in nodes.values():
+        parent_id = parent_of.get(node.id)
+        (nodes[parent_id].children if parent_id else roots).append(node)
+
+    _sort(roots)
+    return roots
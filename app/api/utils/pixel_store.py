@@ -0,0 +1,119 @@
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from app.core.config import settings
+
+# Render-ready derivatives are raw RGBA rows behind a small fixed header.
+MAGIC = b"RGBA"
+HEADER = struct.Struct("<4sII")
+SUFFIX = ".rgba"
+BYTES_PER_PIXEL = 4
+
+
+def derivative_path(source: str | Path) -> Path:
+    source = Path(source)
+    return source.with_name(f"{source.name}{SUFFIX}")
+
+
+def write_raw(path: Path, image: Image.Image) -> Path:
+    """Write an RGBA image as a raw derivative, atomically."""
+    if image.mode != "RGBA":
+        raise ValueError(f"Raw derivatives must be RGBA, got {image.mode}")
+
+    partial_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with partial_path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, *image.size))
+        f.write(image.tobytes("raw", "RGBA"))
+    partial_path.replace(path)
+    return path
+
+
+def read_size(path: Path) -> tuple[int, int] | None:
+    """A derivative's size from its header, without mapping it; None if there isn't a valid one."""
+    try:
+        with path.open("rb") as f:
+            magic, width, height = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return (width, height) if magic == MAGIC else None
+
+
+class RawMapping:
+    """A read-only mapping of one derivative file."""
+
+    __slots__ = ("height", "pixels", "width")
+
+    def __init__(self, path: Path):
+        with path.open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.width, self.height = HEADER.unpack_from(mapped)
+        if magic != MAGIC or len(mapped) != HEADER.size + self.width * self.height * BYTES_PER_PIXEL:
+            raise OSError(f"Corrupt raw derivative: {path}")
+        self.pixels = memoryview(mapped)[HEADER.size :]
+
+    def rows(self, top: int, bottom: int) -> Image.Image | None:
+        """Wrap rows `top` to `bottom` as an image sharing the mapped memory, or None if empty."""
+        top, bottom = max(top, 0), min(bottom, self.height)
+        if top >= bottom:
+            return None
+
+        stride = self.width * BYTES_PER_PIXEL
+        band = self.pixels[top * stride : bottom * stride]
+        return Image.frombuffer("RGBA", (self.width, bottom - top), band, "raw", "RGBA", 0, 1)
+
+
+class PixelStore:
+    """
+    Memory-mapped access to render-ready derivatives.
+
+    Mappings are kept open (up to `max_open`) so repeated renders skip the open and mmap
+    calls. The pixels live in the OS page cache, so every worker process on the host
+    shares a single copy of each popular image, and reading a band of rows only faults in
+    the pages backing those rows.
+    """
+
+    def __init__(self, max_open: int):
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._mappings: OrderedDict[Path, RawMapping] = OrderedDict()
+
+    def _mapping(self, path: Path) -> RawMapping:
+        with self._lock:
+            mapping = self._mappings.get(path)
+            if mapping is not None:
+                self._mappings.move_to_end(path)
+                return mapping
+
+        mapping = RawMapping(path)
+        with self._lock:
+            self._mappings[path] = mapping
+            # Evicted mappings are unmapped once the images still using them are released.
+            while len(self._mappings) > self.max_open:
+                self._mappings.popitem(last=False)
+        return mapping
+
+    def open(self, path: Path, rows: tuple[int, int] | None = None) -> Image.Image | None:
+        """
+        Open a derivative as a read-only RGBA image without decoding or copying.
+
+        With `rows`, only that band of rows is exposed (None if it lies outside the image).
+        Raises FileNotFoundError if the derivative doesn't exist.
+        """
+        mapping = self._mapping(path)
+        if rows is None:
+            return mapping.rows(0, mapping.height)
+        return mapping.rows(*rows)
+
+    def prefetch(self, path: Path) -> None:
+        """Map a derivative and have the OS start reading it into the page cache."""
+        self._mapping(path).pixels.obj.madvise(mmap.MADV_WILLNEED)
+
+
+pixel_store = PixelStore(settings.PIXEL_STORE_MAX_OPEN)
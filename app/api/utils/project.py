@@ -1,8 +1,14 @@
+from pathlib import Path
+
 from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
 from sqlalchemy.orm import Session
 
+from app.api.utils.ingest import UPLOAD_DIR
+from app.models.layer import Layer as LayerModel
 from app.models.project import Project as ProjectModel
 from app.models.user import User as UserModel
+from app.schemas.layer_properties import ImageProperties
 
 
 def fetch_owned_project(db: Session, project_id: str, current_user: UserModel) -> ProjectModel:
@@ -15,3 +21,45 @@ def fetch_owned_project(db: Session, project_id: str, current_user: UserModel) -
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
+
+
+def upload_path(project_id: str, filename: str) -> Path:
+    """Where an upload to a project is stored; 409 if a file of that name was already uploaded."""
+    file_path = UPLOAD_DIR.joinpath(f"{project_id}_{Path(filename).name}")
+    if file_path.exists():
+        raise HTTPException(
+            status_code=409,
+            detail="A file with this name already exists. Please rename the file and try again.",
+        )
+    return file_path
+
+
+def check_image(file_path: Path) -> None:
+    """
+    Check a stored upload is an image that can be decoded; 400 if it isn't one, 413 if it
+    has more pixels than Pillow's decompression bomb limit.
+    """
+    try:
+        with Image.open(file_path) as image:
+            too_large = image.width * image.height > Image.MAX_IMAGE_PIXELS
+    except Image.DecompressionBombError:
+        too_large = True
+    except (UnidentifiedImageError, OSError) as exc:
+        raise HTTPException(status_code=400, detail="File is not a supported image") from exc
+
+    if too_large:
+        raise HTTPException(status_code=413, detail="Image dimensions exceed the maximum supported size")
+
+
+def add_image_layer(db: Session, project: ProjectModel, file_path: Path) -> LayerModel:
+    """Create an image layer for a stored upload."""
+    layer = LayerModel(
+        project_id=project.id,
+        type="image",
+        properties=ImageProperties(path=str(file_path), x=0, y=0).model_dump(),
+    )
+
+    db.add(layer)
+    db.commit()
+    db.refresh(layer)
+    return layer
@@ -0,0 +1,173 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import AbstractContextManager, ExitStack, nullcontext
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from app.api.profiling import profiled
+from app.api.utils.display_list import DisplayList, display_lists
+from app.api.utils.image import FINAL, RenderQuality, encode_image, render_image
+from app.api.utils.singleflight import FileLockSingleFlight, SingleFlight
+from app.core.config import settings
+from app.models.project import Project
+
+render_flight: SingleFlight[bytes] = SingleFlight()
+shared_render_flight = (
+    FileLockSingleFlight(Path(settings.RENDER_SHARED_FLIGHT_DIR), ttl=settings.RENDER_SHARED_FLIGHT_TTL)
+    if settings.RENDER_SHARED_FLIGHT_DIR
+    else None
+)
+
+
+class RenderCache:
+    """
+    Encoded renders, least recently used first out once they exceed `max_bytes`.
+
+    Keys carry the project revision, so edits never serve stale bytes; old revisions just
+    age out.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def put(self, key: tuple, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = content
+            self._bytes += len(content)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+render_cache = RenderCache(settings.RENDER_CACHE_BYTES)
+
+
+def render_key(project: Project, chosen_format: str, quality: RenderQuality = FINAL) -> tuple:
+    """Identify a rendered output: same project revision and render settings, same bytes."""
+    pil_format, options = quality.encoders[chosen_format]
+    return (project.id, project.revision, quality.name, pil_format, tuple(sorted(options.items())))
+
+
+def _free(_display_list: DisplayList) -> None:
+    pass
+
+
+class RenderNotAdmitted(Exception):
+    """
+    The caller running a coalesced render was turned away by its `slot` or `charge`.
+
+    Callers that were waiting on that render get this too; only the caller it belongs to
+    (`attempt`) should see the 429, the others retry and may run the render themselves.
+    """
+
+    def __init__(self, error: HTTPException, attempt: object):
+        super().__init__(error)
+        self.error = error
+        self.attempt = attempt
+
+
+def _render_and_cache(
+    key: tuple,
+    project: Project,
+    chosen_format: str,
+    quality: RenderQuality,
+    slot: Callable[[], AbstractContextManager],
+    charge: Callable[[DisplayList], None],
+    attempt: object,
+) -> bytes:
+    def render() -> bytes:
+        display_list = display_lists.get(project)
+        try:
+            charge(display_list)
+        except HTTPException as exc:
+            raise RenderNotAdmitted(exc, attempt) from exc
+        return encode_image(render_image(display_list, quality), chosen_format, quality)
+
+    with ExitStack() as stack:
+        try:
+            stack.enter_context(slot())
+        except HTTPException as exc:
+            raise RenderNotAdmitted(exc, attempt) from exc
+
+        content = shared_render_flight.do(key, render) if shared_render_flight is not None else render()
+    render_cache.put(key, content)
+    return content
+
+
+async def render_coalesced(
+    project: Project,
+    chosen_format: str,
+    quality: RenderQuality = FINAL,
+    slot: Callable[[], AbstractContextManager] = nullcontext,
+    charge: Callable[[DisplayList], None] = _free,
+) -> bytes:
+    """
+    Render and encode a project, reusing a cached render of the same revision if there is one.
+
+    Concurrent requests for the same revision, format and quality within this worker wait
+    for a single render; with `RENDER_SHARED_FLIGHT_DIR` set, workers on the same host also
+    coalesce through a file lock. Draft and final renders are cached separately.
+
+    `slot` is entered around the render itself, and `charge` is called with the compiled
+    display list by the request that ends up running it, so cache hits and requests
+    waiting on another's render neither count against concurrency limits nor pay for the
+    work. If the request running the render is turned away by either, requests waiting
+    on it retry rather than sharing its 429.
+    """
+    key = render_key(project, chosen_format, quality)
+    attempt = object()
+    while True:
+        cached = render_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            return await render_flight.do_async(
+                key,
+                profiled(
+                    lambda: _render_and_cache(key, project, chosen_format, quality, slot, charge, attempt)
+                ),
+            )
+        except RenderNotAdmitted as exc:
+            if exc.attempt is attempt:
+                raise exc.error from None
+
+
+def render_cached(
+    project: Project,
+    chosen_format: str,
+    quality: RenderQuality = FINAL,
+    slot: Callable[[], AbstractContextManager] = nullcontext,
+) -> bytes:
+    """Blocking counterpart of `render_coalesced`, for use from worker threads."""
+    key = render_key(project, chosen_format, quality)
+    attempt = object()
+    while True:
+        cached = render_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            return render_flight.do(
+                key,
+                lambda: _render_and_cache(key, project, chosen_format, quality, slot, _free, attempt),
+            )
+        except RenderNotAdmitted as exc:
+            if exc.attempt is attempt:
+                raise exc.error from None
@@ -0,0 +1,90 @@
+import gzip
+
+import orjson
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.layer import Layer as LayerModel
+from app.models.project import Project as ProjectModel
+from app.schemas.layer import StoredLayer
+from app.schemas.project import Project
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is used when brotli isn't installed
+    brotli = None
+
+# The columns behind each field of the response schemas, so the two can't drift apart
+LAYER_COLUMNS = tuple(
+    getattr(LayerModel, name) for name in ("type", "properties", *StoredLayer.model_fields)
+)
+PROJECT_FIELDS = tuple(name for name in Project.model_fields if name != "layers")
+
+
+def project_layer_rows(db: Session, project_id: str) -> list[dict]:
+    """
+    Load a project's layers as plain dicts, skipping ORM object construction.
+
+    The rows mirror the `Layer` response schema, so they can be serialized as is.
+    """
+    rows = db.execute(
+        select(*LAYER_COLUMNS)
+        .where(LayerModel.project_id == project_id)
+        .order_by(LayerModel.created_at, LayerModel.id)
+    )
+    return [dict(row) for row in rows.mappings()]
+
+
+def project_to_dict(project: ProjectModel, layers: list[dict]) -> dict:
+    return {**{name: getattr(project, name) for name in PROJECT_FIELDS}, "layers": layers}
+
+
+def _quality(params: list[str]) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _choose_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the supported coding the client weighs highest, preferring br on ties."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, *params = part.split(";")
+        weights[coding.strip()] = _quality(params)
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = weights.get("*", 0.0)
+    encoding = max(supported, key=lambda coding: weights.get(coding, wildcard))
+    return encoding if weights.get(encoding, wildcard) > 0 else None
+
+
+def json_response(content: dict, accept_encoding: str | None = None) -> Response:
+    """
+    Serialize trusted data with orjson, bypassing response model validation.
+
+    Only use this for data read back from the database, which was validated on the way in.
+    Bodies over `RESPONSE_COMPRESSION_MIN_SIZE` are compressed when the client accepts it.
+    """
+    body = orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    headers = {}
+
+    if len(body) >= settings.RESPONSE_COMPRESSION_MIN_SIZE:
+        encoding = _choose_encoding(accept_encoding)
+        if encoding == "br":
+            body = brotli.compress(body, quality=settings.RESPONSE_COMPRESSION_LEVEL)
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=settings.RESPONSE_COMPRESSION_LEVEL)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,125 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Generic, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Collapse concurrent calls sharing a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is still
+    running wait for and share its result (or exception). Nothing is kept once the call
+    finishes, so this deduplicates work in flight without acting as a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, fn: Callable[[], T]) -> T:
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run `fn` for `key` from a worker thread, or wait for the run already in flight."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        return self._finish(key, future, fn)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Like `do`, but runs `fn` in the threadpool and awaits without blocking the event loop."""
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        return await run_in_threadpool(self._finish, key, future, fn)
+
+
+class FileLockSingleFlight:
+    """
+    Collapse identical calls across worker processes on one host.
+
+    Workers serialize on an exclusive `flock` per key. The worker that gets the lock
+    first runs the function and publishes the bytes next to the lock file; workers that
+    were waiting find a fresh result once they get the lock and read it instead of
+    recomputing. Results older than `ttl` seconds are ignored and swept, so keys must
+    change whenever the output would (e.g. include a revision).
+    """
+
+    def __init__(self, directory: Path, ttl: float = 5.0):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._last_sweep = 0.0
+
+    def _paths(self, key: Hashable) -> tuple[Path, Path]:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.directory / f"{digest}.lock", self.directory / f"{digest}.out"
+
+    def _is_fresh(self, path: Path) -> bool:
+        try:
+            return time.time() - path.stat().st_mtime < self.ttl
+        except FileNotFoundError:
+            return False
+
+    def _sweep(self) -> None:
+        """Remove stale results and locks; a lock removed under a waiter only costs a duplicate run."""
+        now = time.time()
+        if now - self._last_sweep < self.ttl:
+            return
+        self._last_sweep = now
+
+        for path in self.directory.iterdir():
+            try:
+                if now - path.stat().st_mtime > self.ttl:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+
+    def do(self, key: Hashable, fn: Callable[[], bytes]) -> bytes:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock_path, result_path = self._paths(key)
+
+        with lock_path.open("ab") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self._is_fresh(result_path):
+                    return result_path.read_bytes()
+
+                result = fn()
+                partial_path = result_path.with_suffix(f".{os.getpid()}.tmp")
+                partial_path.write_bytes(result)
+                partial_path.replace(result_path)
+                os.utime(lock_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        self._sweep()
+        return result
@@ -0,0 +1,218 @@
+import base64
+import io
+import math
+from collections.abc import Iterable, Iterator
+from xml.sax.saxutils import quoteattr
+
+from PIL import Image, ImageStat
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.api.utils.ingest import open_render_ready
+from app.api.utils.layer_tree import build_layer_tree
+from app.core.database import SessionLocal
+from app.models.layer import Layer as LayerModel
+
+CHUNK_SIZE = 64 * 1024
+# Multiple of 3 so base64 chunks concatenate without padding in between.
+BASE64_CHUNK_SIZE = 3 * 16 * 1024
+LAYER_BATCH_SIZE = 500
+
+
+def _num(value: float) -> str:
+    return f"{value:.6g}"
+
+
+def _rectangle(props: dict) -> str:
+    return (
+        f'<rect x="{_num(props["x"])}" y="{_num(props["y"])}" width="{_num(props["width"])}" '
+        f'height="{_num(props["height"])}" fill={quoteattr(props["color"])}/>'
+    )
+
+
+def _circle(props: dict) -> str:
+    return (
+        f'<circle cx="{_num(props["x"])}" cy="{_num(props["y"])}" r="{_num(props["radius"])}" '
+        f"fill={quoteattr(props['color'])}/>"
+    )
+
+
+def _pen(props: dict) -> str:
+    if len(props["points"]) < 2:
+        return ""
+    points = " ".join(f"{_num(p['x'])},{_num(p['y'])}" for p in props["points"])
+    return (
+        f'<polyline points="{points}" fill="none" stroke={quoteattr(props["color"])} '
+        f'stroke-width="{_num(int(props["stroke_width"]))}"/>'
+    )
+
+
+def _arc(props: dict) -> str:
+    """Match Pillow's arc: clockwise from 3 o'clock, stroked inside the bounding circle."""
+    start, end = props["start_angle"], props["end_angle"]
+    width = int(props["stroke_width"])
+    radius = max(props["radius"] - width / 2, 0)
+    stroke = f'fill="none" stroke={quoteattr(props["color"])} stroke-width="{_num(width)}"'
+
+    sweep = (end - start) % 360
+    if end - start >= 360 or (sweep == 0 and end != start):
+        return f'<circle cx="{_num(props["x"])}" cy="{_num(props["y"])}" r="{_num(radius)}" {stroke}/>'
+    if sweep == 0:
+        return ""
+
+    def point(angle: float) -> str:
+        theta = math.radians(angle)
+        return (
+            f"{_num(props['x'] + radius * math.cos(theta))} {_num(props['y'] + radius * math.sin(theta))}"
+        )
+
+    large_arc = 1 if sweep > 180 else 0
+    arc = f"A {_num(radius)} {_num(radius)} 0 {large_arc} 1 {point(end)}"
+    return f'<path d="M {point(start)} {arc}" {stroke}/>'
+
+
+def _contrast_pivot(image: Image.Image) -> float:
+    """The grey level `ImageEnhance.Contrast` scales around: the image's rounded mean luminance."""
+    return int(ImageStat.Stat(image.convert("L")).mean[0] + 0.5) / 255
+
+
+def _brightness_contrast_filter(filter_id: str, props: dict, pivot: float) -> str:
+    """Match the Pillow contrast then brightness enhancers; sharpness has no SVG equivalent."""
+    brightness, contrast = props.get("brightness", 1.0), props.get("contrast", 1.0)
+    slope = brightness * contrast
+    intercept = pivot * (1 - contrast) * brightness
+    channel = f'type="linear" slope="{_num(slope)}" intercept="{_num(intercept)}"'
+    return (
+        f'<filter id="{filter_id}"><feComponentTransfer>'
+        f"<feFuncR {channel}/><feFuncG {channel}/><feFuncB {channel}/>"
+        f"</feComponentTransfer></filter>"
+    )
+
+
+def _image(props: dict, layer_id: str) -> Iterator[str]:
+    """
+    Embed an image layer as a PNG data URI of the pixels the raster renderer draws:
+    upright and in sRGB, whatever the upload's format or EXIF orientation.
+    """
+    try:
+        image = open_render_ready(props["path"])
+    except (OSError, Image.DecompressionBombError):
+        return
+    if props.get("width") and props.get("height"):
+        size = (int(props["width"]), int(props["height"]))
+    else:
+        size = image.size
+
+    attributes = f'x="{int(props["x"])}" y="{int(props["y"])}" width="{size[0]}" height="{size[1]}"'
+    if props.get("brightness", 1.0) != 1.0 or props.get("contrast", 1.0) != 1.0:
+        filter_id = f"adjust-{layer_id}"
+        pivot = _contrast_pivot(image) if props.get("contrast", 1.0) != 1.0 else 0.0
+        yield _brightness_contrast_filter(filter_id, props, pivot)
+        attributes += f' filter="url(#{filter_id})"'
+
+    encoded = io.BytesIO()
+    image.save(encoded, "PNG", compress_level=1)
+    data = encoded.getbuffer()
+    yield f'<image {attributes} preserveAspectRatio="none" href="data:image/png;base64,'
+    for start in range(0, len(data), BASE64_CHUNK_SIZE):
+        yield base64.b64encode(data[start : start + BASE64_CHUNK_SIZE]).decode("ascii")
+    yield '"/>'
+
+
+SHAPES = {
+    "rectangle": _rectangle,
+    "circle": _circle,
+    "pen": _pen,
+    "arc": _arc,
+}
+
+
+def layer_elements(
+    layer_type: str, props: dict, layer_id: str = "", children: Iterable = ()
+) -> Iterator[str]:
+    """Yield the SVG markup for one layer, in pieces; groups take their child nodes."""
+    if layer_type == "image":
+        yield from _image(props, layer_id)
+    elif layer_type == "group":
+        yield "<g>"
+        for child in children:
+            yield from layer_elements(child.type, child.properties, child.id, child.children)
+        yield "</g>"
+    elif layer_type in SHAPES:
+        yield SHAPES[layer_type](props)
+
+
+def svg_document(width: int, height: int, layers: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    Yield an SVG document for `(id, type, properties[, children])` layers in paint order.
+
+    Markup is buffered into chunks of about `CHUNK_SIZE` bytes, so memory use does not
+    grow with the number of layers.
+    """
+    buffer = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+    ]
+    buffered = len(buffer[0])
+
+    for layer_id, layer_type, props, *children in layers:
+        for piece in layer_elements(layer_type, props, layer_id, *children):
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= CHUNK_SIZE:
+                yield "".join(buffer).encode()
+                buffer, buffered = [], 0
+
+    buffer.append("</svg>\n")
+    yield "".join(buffer).encode()
+
+
+def svg_layer_counts(db: Session, project_id: str) -> tuple[int, int]:
+    """Count a project's layers and, of those, image layers: what an SVG render costs."""
+    layers, images = db.execute(
+        select(func.count(), func.count().filter(LayerModel.type == "image")).where(
+            LayerModel.project_id == project_id
+        )
+    ).one()
+    return layers, images
+
+
+def stream_project_svg(project_id: str, width: int, height: int) -> Iterator[bytes]:
+    """
+    Stream a project as SVG straight from the database, without rasterizing.
+
+    Uses its own session because the response body is produced after the request's
+    session has been closed. Projects with grouped layers are loaded whole to nest them
+    in the renderer's paint order; without groups that is just (created_at, id) order.
+    """
+    with SessionLocal() as db:
+        grouped = db.execute(
+            select(LayerModel.id)
+            .where(LayerModel.project_id == project_id, LayerModel.parent_id.is_not(None))
+            .limit(1)
+        ).first()
+
+        if grouped:
+            rows = db.execute(
+                select(
+                    LayerModel.id,
+                    LayerModel.type,
+                    LayerModel.properties,
+                    LayerModel.parent_id,
+                    LayerModel.created_at,
+                )
+                .where(LayerModel.project_id == project_id)
+                .order_by(LayerModel.created_at, LayerModel.id)
+            ).all()
+            layers = (
+                (node.id, node.type, node.properties, node.children) for node in build_layer_tree(rows)
+            )
+        else:
+            layers = db.execute(
+                select(LayerModel.id, LayerModel.type, LayerModel.properties)
+                .where(LayerModel.project_id == project_id)
+                .order_by(LayerModel.created_at, LayerModel.id)
+                .execution_options(yield_per=LAYER_BATCH_SIZE)
+            )
+        yield from svg_document(width, height, layers)
@@ -0,0 +1,241 @@
+import base64
+import binascii
+import fcntl
+import hashlib
+import time
+from collections.abc import AsyncIterable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import BinaryIO
+
+import anyio
+import orjson
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from ulid import ULID
+
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+# tus reports a failed per-chunk checksum with this (non-standard) status
+CHECKSUM_MISMATCH = 460
+
+
+class UploadSession:
+    """
+    A resumable upload: a `.json` sidecar holding what was declared when it was created,
+    and a `.part` file holding the bytes received so far. The offset is the size of the
+    part file, so it can't drift from what is actually on disk.
+    """
+
+    __slots__ = ("filename", "id", "length", "owner", "part_path", "project_id", "sha256")
+
+    def __init__(
+        self,
+        id: str,
+        owner: str,
+        project_id: str,
+        filename: str,
+        length: int,
+        sha256: str | None,
+        part_path: Path,
+    ):
+        self.id = id
+        self.owner = owner
+        self.project_id = project_id
+        self.filename = filename
+        self.length = length
+        self.sha256 = sha256
+        self.part_path = part_path
+
+    @property
+    def offset(self) -> int:
+        return self.part_path.stat().st_size
+
+    def expires_at(self, ttl: float) -> datetime:
+        return datetime.fromtimestamp(self.part_path.stat().st_mtime + ttl, UTC)
+
+    def to_json(self) -> bytes:
+        return orjson.dumps(
+            {
+                "id": self.id,
+                "owner": self.owner,
+                "project_id": self.project_id,
+                "filename": self.filename,
+                "length": self.length,
+                "sha256": self.sha256,
+            }
+        )
+
+
+def parse_checksum(header: str | None) -> bytes | None:
+    """Parse a tus `Upload-Checksum` header, `sha256 <base64 digest>`."""
+    if header is None:
+        return None
+    algorithm, _, encoded = header.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise HTTPException(status_code=400, detail="Only sha256 checksums are supported")
+    try:
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except binascii.Error as exc:
+        raise HTTPException(status_code=400, detail="Malformed Upload-Checksum header") from exc
+    if len(digest) != hashlib.sha256().digest_size:
+        raise HTTPException(status_code=400, detail="Malformed Upload-Checksum header")
+    return digest
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadSessionStore:
+    """
+    Upload sessions kept as files in one directory, so any worker on the host can take
+    the next chunk. Chunks are streamed straight into the part file under an exclusive
+    `flock`, so memory use per request is one read buffer however large the upload.
+
+    Sessions expire `ttl` seconds after their last chunk; expired sessions are swept
+    when new ones are created.
+    """
+
+    def __init__(self, directory: Path, ttl: float):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self._last_sweep = 0.0
+
+    def _paths(self, upload_id: str) -> tuple[Path, Path]:
+        return self.directory / f"{upload_id}.json", self.directory / f"{upload_id}.part"
+
+    def _is_expired(self, part_path: Path, now: float) -> bool:
+        try:
+            return now - part_path.stat().st_mtime > self.ttl
+        except FileNotFoundError:
+            return True
+
+    def sweep(self) -> None:
+        now = time.time()
+        if now - self._last_sweep < self.ttl / 10:
+            return
+        self._last_sweep = now
+
+        for meta_path in self.directory.glob("*.json"):
+            if self._is_expired(meta_path.with_suffix(".part"), now):
+                self.delete(meta_path.stem)
+
+    def create(
+        self, owner: str, project_id: str, filename: str, length: int, sha256: str | None
+    ) -> UploadSession:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sweep()
+
+        upload_id = str(ULID())
+        meta_path, part_path = self._paths(upload_id)
+        session = UploadSession(upload_id, owner, project_id, filename, length, sha256, part_path)
+        part_path.touch()
+        meta_path.write_bytes(session.to_json())
+        return session
+
+    def get(self, upload_id: str) -> UploadSession | None:
+        """Load a session; None if it doesn't exist or has expired (and is removed)."""
+        meta_path, part_path = self._paths(Path(upload_id).name)
+        try:
+            meta = orjson.loads(meta_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        if self._is_expired(part_path, time.time()):
+            self.delete(upload_id)
+            return None
+        return UploadSession(part_path=part_path, **meta)
+
+    def delete(self, upload_id: str) -> None:
+        for path in self._paths(Path(upload_id).name):
+            path.unlink(missing_ok=True)
+
+    @contextmanager
+    def open_part(self, session: UploadSession) -> Iterator[BinaryIO]:
+        """Open a session's part file for writing, holding its lock; 409 if another request has it."""
+        try:
+            part = session.part_path.open("r+b")
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail="Upload not found") from exc
+
+        with part:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError as exc:
+                raise HTTPException(status_code=409, detail="Another chunk is being written") from exc
+            try:
+                yield part
+            finally:
+                fcntl.flock(part, fcntl.LOCK_UN)
+
+    async def write_chunk(
+        self,
+        session: UploadSession,
+        offset: int,
+        stream: AsyncIterable[bytes],
+        checksum: bytes | None = None,
+    ) -> int:
+        """
+        Append a chunk at `offset`, which must be the current offset; returns the new one.
+
+        With a checksum the chunk is all-or-nothing: a mismatch, an oversized chunk or a
+        dropped connection truncates the part file back to `offset`. Without one, whatever
+        arrived is kept, so a client can resume from the last byte received.
+
+        Data is written in `CHUNK_SIZE` blocks from the threadpool, so slow disks don't
+        stall the event loop.
+        """
+        with self.open_part(session) as part:
+            current = await run_in_threadpool(part.seek, 0, 2)
+            if offset != current:
+                raise HTTPException(
+                    status_code=409,
+                    detail="Upload-Offset does not match the upload",
+                    headers={"Upload-Offset": str(current)},
+                )
+
+            digest = hashlib.sha256()
+            buffer = bytearray()
+            end = offset
+            try:
+                async for data in stream:
+                    end += len(data)
+                    if end > session.length:
+                        raise HTTPException(
+                            status_code=413, detail="Chunk exceeds the declared Upload-Length"
+                        )
+                    digest.update(data)
+                    buffer += data
+                    if len(buffer) >= CHUNK_SIZE:
+                        await run_in_threadpool(part.write, buffer)
+                        buffer.clear()
+
+                if checksum is not None and digest.digest() != checksum:
+                    raise HTTPException(status_code=CHECKSUM_MISMATCH, detail="Checksum mismatch")
+            except BaseException:
+                with anyio.CancelScope(shield=True):
+                    if checksum is not None or end > session.length:
+                        await run_in_threadpool(part.truncate, offset)
+                    else:
+                        await run_in_threadpool(part.write, buffer)
+                    await run_in_threadpool(part.flush)
+                raise
+
+            await run_in_threadpool(self._finish_chunk, part, buffer)
+
+        return session.offset
+
+    @staticmethod
+    def _finish_chunk(part: BinaryIO, buffer: bytearray) -> None:
+        part.write(buffer)
+        part.flush()
+
+
+upload_sessions = UploadSessionStore(Path(settings.UPLOAD_SESSION_DIR), settings.UPLOAD_SESSION_TTL)
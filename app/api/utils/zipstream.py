@@ -0,0 +1,58 @@
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+
+
+class ChunkSink:
+    """
+    A write-only, unseekable file that hands back what was written since the last drain.
+
+    `zipfile` writes to it with data descriptors instead of seeking back to patch headers,
+    so an archive can be streamed out while it is being built.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """Build a ZIP archive entry by entry, yielding its bytes as they're produced."""
+
+    def __init__(self):
+        self._sink = ChunkSink()
+        self._archive = zipfile.ZipFile(self._sink, "w")
+
+    def write(self, name: str, content: bytes, compress: bool = False) -> bytes:
+        """Add an entry held in memory; returns the archive bytes to send."""
+        compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._archive.writestr(name, content, compress_type=compress_type)
+        return self._sink.drain()
+
+    def write_chunks(self, name: str, chunks: Iterable[bytes], compress: bool = False) -> Iterator[bytes]:
+        """Add an entry from a stream of chunks, yielding archive bytes along the way."""
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with self._archive.open(info, "w", force_zip64=True) as entry:
+            for chunk in chunks:
+                entry.write(chunk)
+                if data := self._sink.drain():
+                    yield data
+        if data := self._sink.drain():
+            yield data
+
+    def close(self) -> bytes:
+        """Finish the archive; returns the central directory."""
+        self._archive.close()
+        return self._sink.drain()
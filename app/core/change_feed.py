@@ -0,0 +1,169 @@
+import asyncio
+import importlib
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+PENDING_KEY = "pending_change_events"
+
+
+class ChangeEvent:
+    """A change to a project, numbered with the project revision it produced."""
+
+    __slots__ = ("kind", "payload", "project_id", "revision")
+
+    def __init__(self, project_id: str, revision: int, kind: str, payload: dict | None = None):
+        self.project_id = project_id
+        self.revision = revision
+        self.kind = kind
+        self.payload = payload
+
+    def to_json(self) -> bytes:
+        return orjson.dumps(
+            {
+                "project_id": self.project_id,
+                "revision": self.revision,
+                "kind": self.kind,
+                **(self.payload or {}),
+            },
+            option=orjson.OPT_UTC_Z,
+        )
+
+
+class Fanout(ABC):
+    """
+    Carries published events to every worker's broker.
+
+    `publish` is called with each committed event; implementations must eventually call
+    the `deliver` callback given to `start` with it, in every worker (including this one).
+    """
+
+    def start(self, deliver: Callable[[ChangeEvent], None]) -> None:
+        self.deliver = deliver
+
+    @abstractmethod
+    def publish(self, change: ChangeEvent) -> None: ...
+
+
+class LocalFanout(Fanout):
+    """Delivers events within this process only."""
+
+    def publish(self, change: ChangeEvent) -> None:
+        self.deliver(change)
+
+
+class Subscription:
+    def __init__(self, project_id: str, max_queued: int):
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[ChangeEvent] = asyncio.Queue(maxsize=max_queued)
+        self.lagged = False
+
+    def offer(self, change: ChangeEvent) -> None:
+        """Queue an event; runs on the subscriber's event loop."""
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+
+class ChangeBroker:
+    """
+    Routes committed project changes to change feed subscribers.
+
+    Recent events are kept per project so reconnecting clients can resume from the
+    revision they last saw. When the events they missed are no longer available, they
+    get a `reset` event and should reload the project.
+    """
+
+    def __init__(self, fanout: Fanout, history_size: int, max_queued: int):
+        self.fanout = fanout
+        self.history_size = history_size
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        self._history: dict[str, deque[ChangeEvent]] = {}
+        self._subscribers: dict[str, set[Subscription]] = {}
+        fanout.start(self._deliver)
+
+    def publish(self, change: ChangeEvent) -> None:
+        self.fanout.publish(change)
+
+    def _deliver(self, change: ChangeEvent) -> None:
+        with self._lock:
+            history = self._history.get(change.project_id)
+            if history is None:
+                history = self._history[change.project_id] = deque(maxlen=self.history_size)
+            history.append(change)
+            subscribers = list(self._subscribers.get(change.project_id, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, change)
+            except RuntimeError:  # the subscriber's event loop has shut down
+                self.unsubscribe(subscription)
+
+    def subscribe(self, project_id: str, since: int, current_revision: int) -> Subscription:
+        """Subscribe to a project, replaying what happened after revision `since`."""
+        subscription = Subscription(project_id, self.max_queued)
+
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+            missed = [change for change in self._history.get(project_id, ()) if change.revision > since]
+
+        latest = max([current_revision, *(change.revision for change in missed)])
+        if since < latest and (not missed or missed[0].revision > since + 1):
+            subscription.offer(ChangeEvent(project_id, latest, "reset"))
+        else:
+            for change in missed:
+                subscription.offer(change)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.project_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.project_id]
+
+
+def _build_fanout(path: str | None) -> Fanout:
+    """Instantiate the fan-out named by a `module:Class` path, defaulting to in-process."""
+    if not path:
+        return LocalFanout()
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+change_broker = ChangeBroker(
+    _build_fanout(settings.CHANGE_FEED_FANOUT),
+    history_size=settings.CHANGE_FEED_HISTORY,
+    max_queued=settings.CHANGE_FEED_MAX_QUEUED,
+)
+
+
+def queue_change(session: Session | None, change: ChangeEvent) -> None:
+    """Hold an event until the session's transaction commits; dropped on rollback."""
+    if session is None:
+        change_broker.publish(change)
+        return
+    session.info.setdefault(PENDING_KEY, []).append(change)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session):
+    for change in session.info.pop(PENDING_KEY, ()):
+        change_broker.publish(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(PENDING_KEY, None)
@@ -7,11 +7,58 @@ class Settings(BaseSettings):
 
     # Database
     SQLALCHEMY_DATABASE_URL: str = "sqlite:///./photo_editing.db"
+    # Create missing tables at startup instead of running `alembic upgrade head` (development only)
+    AUTO_CREATE_SCHEMA: bool = False
 
     # Security
     SECRET_KEY: str
     ADMIN_API_KEY: str
 
+    # Rendering
+    DISPLAY_LIST_CACHE_SIZE: int = 256
+    PIXEL_STORE_MAX_OPEN: int = 256
+    WARM_IMAGES: int = 0  # images of recently edited projects mapped into the pixel store at startup
+    GROUP_BITMAP_CACHE_BYTES: int = 256 * 1024 * 1024  # flattened bitmaps of frozen groups
+    RENDER_CACHE_BYTES: int = 64 * 1024 * 1024  # encoded renders, per worker
+    DRAFT_RENDER_SCALE: float = 0.5  # canvas scale of draft renders, upsampled to full size
+    EXPORT_WORKERS: int = 4  # render threads shared by batch exports, per worker
+    # Directory for coalescing identical renders across workers on one host (disabled if unset)
+    RENDER_SHARED_FLIGHT_DIR: str | None = None
+    RENDER_SHARED_FLIGHT_TTL: float = 5.0
+
+    # Responses larger than this are compressed when the client accepts gzip or br
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 64 * 1024
+    RESPONSE_COMPRESSION_LEVEL: int = 1  # favour latency over ratio on large layer lists
+
+    # Change feed
+    CHANGE_FEED_HISTORY: int = 256  # events kept per project for resuming clients
+    CHANGE_FEED_MAX_QUEUED: int = 1024  # per subscriber; slower clients get a reset
+    CHANGE_FEED_KEEPALIVE: float = 15.0
+    # "module:Class" of a Fanout relaying events between workers (in-process if unset)
+    CHANGE_FEED_FANOUT: str | None = None
+
+    # Project archives: the most an archive may unpack to
+    ARCHIVE_MAX_SIZE: int = 4 * 1024 * 1024 * 1024
+
+    # Resumable uploads: sessions expire this long after their last chunk
+    UPLOAD_SESSION_DIR: str = "uploads/sessions"
+    UPLOAD_SESSION_TTL: float = 24 * 60 * 60
+    UPLOAD_SESSION_MAX_SIZE: int = 1024 * 1024 * 1024
+
+    # Rate limiting: per-user token buckets, refilled in cost units per second
+    RENDER_RATE: float = 2.0
+    RENDER_BURST: float = 60.0
+    UPLOAD_RATE: float = 1.0
+    UPLOAD_BURST: float = 20.0
+    # Requests of each class running at once in one worker
+    RENDER_MAX_CONCURRENCY: int = 4
+    UPLOAD_MAX_CONCURRENCY: int = 4
+    # SQLite file sharing the buckets between workers on one host (in memory if unset)
+    RATE_LIMIT_SQLITE_PATH: str | None = None
+
+    # Profiling
+    PROFILE_DIR: str = "profiles"
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+import time
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """
+        Take `cost` tokens from a bucket refilling at `rate` per second up to `capacity`.
+
+        Returns 0 when the tokens were taken, otherwise the seconds until they will be.
+        """
+        cost = min(cost, capacity)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, rate, capacity)
+            if tokens < cost:
+                self._buckets[key] = (tokens, now)
+                return (cost - tokens) / rate
+            self._buckets[key] = (tokens - cost, now)
+            return 0.0
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file shared by the workers on one host.
+
+    Each take runs in its own IMMEDIATE transaction, so concurrent workers serialize
+    on the database lock instead of racing on the counters.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        cost = min(cost, capacity)
+        # Wall clock rather than monotonic: the timestamps are compared across processes.
+        now = time.time()
+        connection = self._connection()
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*row, now, rate, capacity) if row else capacity
+
+            retry_after = 0.0
+            if tokens < cost:
+                retry_after = (cost - tokens) / rate
+            else:
+                tokens -= cost
+
+            connection.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return retry_after
+
+
+class ConcurrencyLimiter:
+    """A cap on how many requests of one kind run at once in this worker."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._released = threading.Condition()
+        self._active = 0
+
+    def try_acquire(self) -> bool:
+        with self._released:
+            if self._active >= self.limit:
+                return False
+            self._active += 1
+            return True
+
+    def acquire(self) -> None:
+        """Block until under the limit; for work that should queue rather than be turned away."""
+        with self._released:
+            self._released.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+    def release(self) -> None:
+        with self._released:
+            self._active -= 1
+            self._released.notify()
@@ -1,8 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
-
 from app.core.config import settings
 
 # JWT configuration
@@ -12,6 +10,9 @@ ALGORITHM = "HS256"
 
 def create_jwt_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT token"""
+    # Imported on first use: the crypto backends are the slowest import at startup.
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now() + expires_delta
@@ -23,6 +24,8 @@ def create_jwt_token(data: dict, expires_delta: Optional[timedelta] = None) -> s
 
 def verify_jwt_token(token: str) -> dict:
     """Verify a JWT token"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -1,18 +1,49 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 
-from app.api.endpoints import auth, layers, projects
+from app.api.endpoints import admin, archives, auth, events, layers, projects, uploads
+from app.api.profiling import ProfilingMiddleware
+from app.api.utils.ingest import UPLOAD_DIR, warm_recent_images
 from app.core.config import settings
 from app.core.database import Base, engine
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepare each worker before it serves requests, rather than at import time.
+
+    The schema is managed by Alembic (`alembic upgrade head`, run once per deploy);
+    AUTO_CREATE_SCHEMA creates missing tables instead, for development.
+    """
+    if settings.AUTO_CREATE_SCHEMA:
+        Base.metadata.create_all(bind=engine)
+    UPLOAD_DIR.mkdir(exist_ok=True)
+
+    if settings.WARM_IMAGES:
+        warmed = await run_in_threadpool(warm_recent_images, settings.WARM_IMAGES)
+        logger.info("Warmed %d images", warmed)
+    yield
+
 
-app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json")
+app = FastAPI(
+    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json", lifespan=lifespan
+)
+app.add_middleware(ProfilingMiddleware)
 
 # Include routers
 app.include_router(projects.router, prefix=settings.API_V1_STR, tags=["projects"])
 app.include_router(layers.router, prefix=settings.API_V1_STR, tags=["layers"])
+app.include_router(uploads.router, prefix=settings.API_V1_STR, tags=["uploads"])
+app.include_router(archives.router, prefix=settings.API_V1_STR, tags=["archives"])
+app.include_router(events.router, prefix=settings.API_V1_STR, tags=["events"])
 app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["auth"])
+app.include_router(admin.router, prefix=settings.API_V1_STR, tags=["admin"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, String
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ulid import ULID
@@ -11,8 +11,22 @@ class Layer(Base):
 
     id = Column(String(26), primary_key=True, index=True, default=lambda: str(ULID()))
     project_id = Column(String(26), ForeignKey("projects.id", ondelete="CASCADE"))
+    # The group layer containing this layer, if any
+    parent_id = Column(String(26), ForeignKey("layers.id", ondelete="CASCADE"), nullable=True, index=True)
     type = Column(String)
     properties = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every change; the layer's ETag, for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     project = relationship("Project", back_populates="layers")
+    children = relationship("Layer", cascade="all, delete")
+
+    # Fetch server defaults (created_at) with RETURNING, so change events can include them
+    __mapper_args__ = {"eager_defaults": True}
+
+
+@event.listens_for(Layer, "before_update")
+def bump_layer_version(_mapper, _connection, target):
+    """Bump the layer's version when its columns change"""
+    target.version = Layer.version + 1
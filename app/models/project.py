@@ -1,11 +1,14 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, event
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, event, inspect, select
+from sqlalchemy.orm import object_session, relationship
 from sqlalchemy.sql import func
 from ulid import ULID
 
+from app.core.change_feed import ChangeEvent, queue_change
 from app.core.database import Base
 from app.models.layer import Layer
 
+LAYER_FIELDS = ("id", "project_id", "parent_id", "type", "properties", "created_at", "version")
+
 
 class Project(Base):
     __tablename__ = "projects"
@@ -20,16 +23,67 @@ class Project(Base):
     height = Column(Integer, default=600)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="projects")
     layers = relationship("Layer", back_populates="project", cascade="all, delete-orphan")
 
 
+@event.listens_for(Project, "before_update")
+def bump_project_revision(_mapper, _connection, target):
+    """Bump the project's revision when its own columns change"""
+    target.revision = Project.revision + 1
+
+
+@event.listens_for(Project, "after_update")
+def publish_project_update(_mapper, connection, target):
+    """Publish project detail changes to the change feed"""
+    state = inspect(target).dict
+    revision = connection.execute(select(Project.revision).where(Project.id == target.id)).scalar()
+    details = {field: state.get(field) for field in ("name", "description", "width", "height")}
+    queue_change(object_session(target), ChangeEvent(target.id, revision, "project", {"project": details}))
+
+
+def layer_payload(target: Layer) -> dict:
+    """The loaded columns of a layer, without triggering loads mid-flush"""
+    state = inspect(target).dict
+    return {field: state[field] for field in LAYER_FIELDS if field in state}
+
+
+def record_layer_change(session, connection, project_id: str, kind: str, layer: dict) -> int | None:
+    """
+    Update a project's updated_at timestamp and revision for a change to one of its layers,
+    and publish the change once the transaction commits. Returns the new revision.
+
+    Called by the layer mapper events, and directly by bulk statements that bypass them.
+    """
+    revision = connection.execute(
+        Project.__table__.update()
+        .where(Project.id == project_id)
+        .values(updated_at=func.now(), revision=Project.revision + 1)
+        .returning(Project.revision)
+    ).scalar()
+    if revision is not None:
+        queue_change(session, ChangeEvent(project_id, revision, kind, {"layer": layer}))
+    return revision
+
+
+def update_project_timestamp(connection, target, kind):
+    """Update project's updated_at timestamp and revision when layers change, and publish the change"""
+    layer = {"id": target.id} if kind == "deleted" else layer_payload(target)
+    record_layer_change(object_session(target), connection, target.project_id, kind, layer)
+
+
 @event.listens_for(Layer, "after_insert")
+def layer_created(_mapper, connection, target):
+    update_project_timestamp(connection, target, "created")
+
+
 @event.listens_for(Layer, "after_update")
+def layer_patched(_mapper, connection, target):
+    update_project_timestamp(connection, target, "patched")
+
+
 @event.listens_for(Layer, "after_delete")
-def update_project_timestamp(_mapper, connection, target):
-    """Update project's updated_at timestamp when layers change"""
-    connection.execute(
-        Project.__table__.update().where(Project.id == target.project_id).values(updated_at=func.now())
-    )
+def layer_deleted(_mapper, connection, target):
+    update_project_timestamp(connection, target, "deleted")
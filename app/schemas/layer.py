@@ -1,19 +1,20 @@
 from datetime import datetime
-from typing import Literal, Optional, Union
+from typing import Annotated, Literal, Union
 
 from pydantic import BaseModel, Field
 
 from .layer_properties import (
     ArcProperties,
     CircleProperties,
+    GroupProperties,
     ImageProperties,
     PenProperties,
     RectangleProperties,
 )
 
-LayerType = Literal["rectangle", "circle", "pen", "arc", "image"]
+LayerType = Literal["rectangle", "circle", "pen", "arc", "image", "group"]
 LayerProperties = Union[
-    RectangleProperties, CircleProperties, PenProperties, ArcProperties, ImageProperties
+    RectangleProperties, CircleProperties, PenProperties, ArcProperties, ImageProperties, GroupProperties
 ]
 
 
@@ -26,16 +27,74 @@ class LayerCreate(LayerBase):
     pass
 
 
-class Layer(LayerBase):
+class StoredLayer(BaseModel):
     id: str
     project_id: str
+    parent_id: str | None = None
     created_at: datetime
+    version: int = 1
 
     class Config:
         from_attributes = True
 
 
-class ImageAdjustments(BaseModel):
-    contrast: Optional[float] = Field(None, ge=0, le=2.0, description="Contrast adjustment (0-2)")
-    brightness: Optional[float] = Field(None, ge=0, le=2.0, description="Brightness adjustment (0-2)")
-    sharpness: Optional[float] = Field(None, ge=0, le=2.0, description="Sharpness adjustment (0-2)")
+class RectangleLayer(StoredLayer):
+    type: Literal["rectangle"]
+    properties: RectangleProperties
+
+
+class CircleLayer(StoredLayer):
+    type: Literal["circle"]
+    properties: CircleProperties
+
+
+class PenLayer(StoredLayer):
+    type: Literal["pen"]
+    properties: PenProperties
+
+
+class ArcLayer(StoredLayer):
+    type: Literal["arc"]
+    properties: ArcProperties
+
+
+class ImageLayer(StoredLayer):
+    type: Literal["image"]
+    properties: ImageProperties
+
+
+class GroupLayer(StoredLayer):
+    type: Literal["group"]
+    properties: GroupProperties
+
+
+# Tagged on `type`, so each layer is validated against its own properties model only.
+Layer = Annotated[
+    RectangleLayer | CircleLayer | PenLayer | ArcLayer | ImageLayer | GroupLayer,
+    Field(discriminator="type"),
+]
+
+# The properties model of each layer type
+LAYER_PROPERTIES = {
+    "rectangle": RectangleProperties,
+    "circle": CircleProperties,
+    "pen": PenProperties,
+    "arc": ArcProperties,
+    "image": ImageProperties,
+    "group": GroupProperties,
+}
+
+
+class GroupCreate(GroupProperties):
+    children: list[str] = Field([], description="IDs of existing layers to move into the group")
+
+
+class GroupUpdate(BaseModel):
+    name: str | None = None
+    frozen: bool | None = None
+
+
+class LayerParent(BaseModel):
+    parent_id: str | None = Field(
+        None, description="Group to move the layer into, or null for the top level"
+    )
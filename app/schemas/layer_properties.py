@@ -47,3 +47,8 @@ class ImageProperties(Position):
     contrast: float = Field(1.0, ge=0, le=2.0)
     brightness: float = Field(1.0, ge=0, le=2.0)
     sharpness: float = Field(1.0, ge=0, le=2.0)
+
+
+class GroupProperties(BaseModel):
+    name: str | None = Field(None, description="Group name")
+    frozen: bool = Field(False, description="Render the group from a cached flattened bitmap")
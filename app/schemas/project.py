@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from .layer import Layer
 from .util import IdModel
@@ -17,6 +17,7 @@ class ProjectBase(BaseModel):
 class ProjectList(ProjectBase, IdModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
+    revision: int = 0
 
     class Config:
         from_attributes = True
@@ -27,6 +28,7 @@ class ProjectList(ProjectBase, IdModel):
                 "description": "A sample project",
                 "created_at": "2024-02-20T12:00:00Z",
                 "updated_at": "2024-02-20T12:00:00Z",
+                "revision": 3,
             }
         }
 
@@ -38,6 +40,7 @@ class ProjectCreate(ProjectBase):
 class Project(ProjectBase, IdModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
+    revision: int = 0
     layers: list[Layer] = []
 
     class Config:
@@ -49,6 +52,7 @@ class Project(ProjectBase, IdModel):
                 "description": "A sample project",
                 "created_at": "2024-02-20T12:00:00Z",
                 "updated_at": "2024-02-20T12:00:00Z",
+                "revision": 3,
                 "layers": [],
             }
         }
@@ -59,3 +63,10 @@ class ProjectUpdate(BaseModel):
     description: str | None = None
     width: int | None = None
     height: int | None = None
+
+
+class ProjectExport(BaseModel):
+    project_ids: list[str] | None = Field(None, description="Projects to export; all of yours if omitted")
+    format: Literal["png", "jpg", "jpeg", "svg"] = "png"
+    quality: Literal["draft", "final"] = "final"
+    since: datetime | None = Field(None, description="Skip projects unchanged since this time")
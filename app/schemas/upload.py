@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class UploadCreate(BaseModel):
+    filename: str
+    length: int = Field(..., gt=0, description="Size of the whole file in bytes")
+    sha256: str | None = Field(
+        None, pattern="^[0-9a-fA-F]{64}$", description="Hex digest of the whole file, checked on finalize"
+    )
+
+
+class Upload(BaseModel):
+    id: str
+    project_id: str
+    filename: str
+    length: int
+    offset: int
+    expires_at: datetime
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "01HRBK9B2ZK7R6V5M3X4E1QW8T",
+                "project_id": "01HRBK8YNPXN5WK0Q23BACDMR5",
+                "filename": "scan.tif",
+                "length": 73400320,
+                "offset": 16777216,
+                "expires_at": "2024-02-21T12:00:00Z",
+            }
+        }
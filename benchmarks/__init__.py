@@ -0,0 +1,6 @@
+"""
+Benchmarks for the rendering pipeline and the HTTP API.
+
+Run `python -m benchmarks run --output results.json` to record a run and
+`python -m benchmarks compare base.json new.json` to flag regressions between two runs.
+"""
@@ -0,0 +1,95 @@
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks import environment, results
+from benchmarks.workload import WorkloadSpec
+
+SUITES = ("micro", "serialization", "http", "startup")
+
+
+def _run(args: argparse.Namespace) -> int:
+    output = args.output.resolve() if args.output else None
+    workdir = environment.configure(args.workdir)
+
+    spec = WorkloadSpec(
+        width=args.width,
+        height=args.height,
+        layers_per_type=args.layers,
+        pen_points=args.pen_points,
+        image_layers=args.images,
+    )
+
+    collected = {}
+    if "micro" in args.suite:
+        from benchmarks import micro
+
+        collected.update(micro.run(spec, workdir, args.repeat))
+    if "serialization" in args.suite:
+        from benchmarks import serialization
+
+        collected.update(serialization.run(spec, args.serialize_layers, max(args.repeat // 4, 1)))
+    if "http" in args.suite:
+        from benchmarks import load
+
+        collected.update(load.run(spec, workdir, args.requests, args.concurrency))
+    if "startup" in args.suite:
+        from benchmarks import startup
+
+        collected.update(startup.run(workdir, args.startup_runs))
+
+    report = results.build_report(collected, spec.to_dict())
+    for name, stats in sorted(collected.items()):
+        print(f"{name:<32} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms")
+
+    if output:
+        results.save(report, output)
+        print(f"Results written to {output}")
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    base, new = results.load(args.base), results.load(args.new)
+    if base["meta"].get("workload") != new["meta"].get("workload"):
+        print("warning: the two runs used different workloads", file=sys.stderr)
+
+    rows = results.compare(base, new, args.threshold, args.metric)
+    print(results.format_comparison(rows, args.metric))
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks and optionally store the results as JSON")
+    run.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    run.add_argument("--output", type=Path, help="Where to write the JSON results")
+    run.add_argument("--workdir", type=Path, help="Scratch directory (defaults to a temp dir)")
+    run.add_argument("--repeat", type=int, default=20, help="Timed runs per micro-benchmark")
+    run.add_argument("--requests", type=int, default=50, help="Requests per HTTP scenario")
+    run.add_argument("--concurrency", type=int, default=4, help="Client threads per HTTP scenario")
+    run.add_argument("--width", type=int, default=1600)
+    run.add_argument("--height", type=int, default=1200)
+    run.add_argument("--layers", type=int, default=50, help="Layers of each shape type")
+    run.add_argument("--pen-points", type=int, default=200, help="Points per pen stroke")
+    run.add_argument("--images", type=int, default=4, help="Number of image layers")
+    run.add_argument(
+        "--serialize-layers", type=int, default=10_000, help="Layers in the serialization benchmark project"
+    )
+    run.add_argument("--startup-runs", type=int, default=5, help="Cold starts in the startup benchmark")
+    run.set_defaults(handler=_run)
+
+    compare = commands.add_parser("compare", help="Compare two result files and flag regressions")
+    compare.add_argument("base", type=Path)
+    compare.add_argument("new", type=Path)
+    compare.add_argument("--threshold", type=float, default=0.1, help="Relative change to flag")
+    compare.add_argument("--metric", default="median_ms")
+    compare.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
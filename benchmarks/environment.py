@@ -0,0 +1,26 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def configure(workdir: Path | None = None) -> Path:
+    """
+    Point the app at a throwaway working directory and database.
+
+    Must run before anything under `app` is imported, since settings and the engine
+    are created at import time.
+    """
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="raspi-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("ADMIN_API_KEY", "benchmark-admin")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{workdir / 'benchmark.db'}"
+    os.environ.setdefault("AUTO_CREATE_SCHEMA", "true")
+    # The load test measures throughput, not admission control.
+    for name in ("RENDER_BURST", "UPLOAD_BURST", "RENDER_RATE", "UPLOAD_RATE"):
+        os.environ.setdefault(name, "1e9")
+    for name in ("RENDER_MAX_CONCURRENCY", "UPLOAD_MAX_CONCURRENCY"):
+        os.environ.setdefault(name, "1000")
+    return workdir
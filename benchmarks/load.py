@@ -0,0 +1,123 @@
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.timing import summarize
+from benchmarks.workload import WorkloadSpec, generate_layers, write_source_image
+
+SHAPE_ROUTES = {
+    "rectangle": "layers/rectangle",
+    "circle": "layers/circle",
+    "arc": "layers/arc",
+    "pen": "layers/pen",
+}
+
+
+class ApiClient:
+    """TestClient wrapper holding the credentials of a freshly registered user."""
+
+    def __init__(self, client, prefix: str, token: str):
+        self.client = client
+        self.prefix = prefix
+        self.headers = {"X-API-Key": token}
+
+    def request(self, method: str, path: str, **kwargs):
+        response = self.client.request(method, f"{self.prefix}{path}", headers=self.headers, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} failed: {response.status_code} {response.text[:200]}")
+        return response
+
+
+def _login(client, prefix: str, admin_key: str) -> ApiClient:
+    admin = {"X-API-Key": admin_key}
+    client.post(
+        f"{prefix}/auth/register",
+        json={"email": "bench@example.com", "username": "bench"},
+        headers=admin,
+    )
+    token = client.post(f"{prefix}/auth/make_key", params={"username": "bench"}, headers=admin).json()
+    return ApiClient(client, prefix, token["access_token"])
+
+
+def _seed_project(api: ApiClient, spec: WorkloadSpec, layers: list[dict]) -> str:
+    project_id = api.request(
+        "POST", "/projects", json={"name": "benchmark", "width": spec.width, "height": spec.height}
+    ).json()["id"]
+
+    for layer in layers:
+        if layer["type"] == "image":
+            path = Path(layer["properties"]["path"])
+            api.request(
+                "POST",
+                f"/projects/{project_id}/upload",
+                files={"file": (path.name, path.read_bytes(), "image/png")},
+            )
+        else:
+            api.request(
+                "POST", f"/projects/{project_id}/{SHAPE_ROUTES[layer['type']]}", json=layer["properties"]
+            )
+    return project_id
+
+
+def _load(call, requests: int, concurrency: int) -> dict:
+    """Issue `requests` calls over `concurrency` threads, recording per-call latency."""
+
+    def timed(index: int) -> float:
+        started = time.perf_counter()
+        call(index)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(samples)
+    result["requests_per_second"] = round(requests / elapsed, 2)
+    return result
+
+
+def run(spec: WorkloadSpec, workdir: Path, requests: int, concurrency: int) -> dict:
+    """Drive the API in-process through FastAPI's TestClient against a seeded project."""
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.main import app
+
+    layers = generate_layers(spec, workdir / "images")
+    upload_source = write_source_image(workdir / "upload.png", spec.image_size, random.Random(spec.seed))
+    upload_bytes = upload_source.read_bytes()
+    rectangle = next(layer["properties"] for layer in layers if layer["type"] == "rectangle")
+    pen = next(layer["properties"] for layer in layers if layer["type"] == "pen")
+    upload_names = itertools.count()
+
+    with TestClient(app) as client:
+        api = _login(client, settings.API_V1_STR, settings.ADMIN_API_KEY)
+        project_id = _seed_project(api, spec, layers)
+        scratch_id = api.request("POST", "/projects", json={"name": "scratch"}).json()["id"]
+
+        scenarios = {
+            "http.list_projects": lambda _: api.request("GET", "/projects"),
+            "http.get_project": lambda _: api.request("GET", f"/projects/{project_id}"),
+            "http.render_png": lambda _: api.request("GET", f"/projects/{project_id}/render"),
+            "http.render_jpeg": lambda _: api.request(
+                "GET", f"/projects/{project_id}/render", params={"file_extension": "jpg"}
+            ),
+            "http.render_png_draft": lambda _: api.request(
+                "GET", f"/projects/{project_id}/render", params={"quality": "draft"}
+            ),
+            "http.create_rectangle": lambda _: api.request(
+                "POST", f"/projects/{scratch_id}/layers/rectangle", json=rectangle
+            ),
+            "http.create_pen": lambda _: api.request(
+                "POST", f"/projects/{scratch_id}/layers/pen", json=pen
+            ),
+            "http.upload_image": lambda _: api.request(
+                "POST",
+                f"/projects/{scratch_id}/upload",
+                files={"file": (f"upload_{next(upload_names)}.png", upload_bytes, "image/png")},
+            ),
+        }
+        return {name: _load(call, requests, concurrency) for name, call in scenarios.items()}
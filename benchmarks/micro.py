@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from PIL import Image
+
+from benchmarks.timing import measure
+from benchmarks.workload import WorkloadSpec, build_project, generate_layers
+
+
+def run(spec: WorkloadSpec, workdir: Path, repeat: int) -> dict:
+    """Time the renderer and encoders in-process on a synthetic project."""
+    from app.api.utils.display_list import compile_display_list
+    from app.api.utils.image import QUALITIES, apply_image_adjustments, encode_image, render_image
+    from app.api.utils.ingest import normalize_upload
+    from app.api.utils.pixel_store import pixel_store
+    from app.api.utils.svg import svg_document
+    from app.models.layer import Layer
+
+    def compile_and_render(layers: list):
+        return render_image(compile_display_list(project, layers))
+
+    layers = generate_layers(spec, workdir / "images")
+    project, layer_models = build_project(spec, layers)
+    shapes_only = [layer for layer in layer_models if layer.type != "image"]
+    image_layer = next((layer for layer in layer_models if layer.type == "image"), None)
+
+    display_list = compile_display_list(project, layer_models)
+    results = {
+        "compile_display_list": measure(lambda: compile_display_list(project, layer_models), repeat),
+        "render_image.full": measure(lambda: render_image(display_list), repeat),
+        "render_image.full_uncached": measure(lambda: compile_and_render(layer_models), repeat),
+        "render_image.shapes": measure(lambda: compile_and_render(shapes_only), repeat),
+    }
+
+    # The shapes in one frozen group: after the first render, a single cached composite.
+    group = Layer(
+        id="group", type="group", properties={"frozen": True}, created_at=shapes_only[0].created_at
+    )
+    grouped = [group] + [
+        Layer(
+            id=layer.id,
+            type=layer.type,
+            properties=layer.properties,
+            created_at=layer.created_at,
+            parent_id="group",
+        )
+        for layer in shapes_only
+    ]
+    grouped_list = compile_display_list(project, grouped)
+    results["render_image.frozen_group"] = measure(lambda: render_image(grouped_list), repeat)
+
+    for layer_type in ("rectangle", "circle", "arc", "pen"):
+        subset = [layer for layer in layer_models if layer.type == layer_type]
+        results[f"render_image.{layer_type}"] = measure(lambda s=subset: compile_and_render(s), repeat)
+
+    if image_layer is not None:
+        source = Image.open(image_layer.properties["path"])
+        source.load()
+        results["apply_image_adjustments"] = measure(
+            lambda: apply_image_adjustments(source, image_layer.properties), repeat
+        )
+
+        path = image_layer.properties["path"]
+        results["image_load.decode"] = measure(lambda: Image.open(path).load(), repeat)
+        derivative = normalize_upload(path)
+        results["image_load.pixel_store"] = measure(lambda: pixel_store.open(derivative).load(), repeat)
+        band = (0, spec.image_size[1] // 4)
+        results["image_load.pixel_store_rows"] = measure(
+            lambda: pixel_store.open(derivative, band).load(), repeat
+        )
+
+    shape_rows = [(str(index), layer.type, layer.properties) for index, layer in enumerate(shapes_only)]
+    results["export.svg.shapes"] = measure(
+        lambda: b"".join(svg_document(spec.width, spec.height, shape_rows)), repeat
+    )
+    results["export.png.shapes"] = measure(
+        lambda: encode_image(compile_and_render(shapes_only), "png"), repeat
+    )
+
+    rendered = render_image(display_list)
+    results["encode.png"] = measure(lambda: encode_image(rendered, "png"), repeat)
+    results["encode.jpeg"] = measure(lambda: encode_image(rendered, "jpg"), repeat)
+
+    # Render plus encode at each quality: the latency gap between previews and final output.
+    for name, quality in QUALITIES.items():
+        for chosen_format in ("png", "jpg"):
+            results[f"render.{name}.{chosen_format}"] = measure(
+                lambda q=quality, f=chosen_format: encode_image(render_image(display_list, q), f, q), repeat
+            )
+    return results
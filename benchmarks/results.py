@@ -0,0 +1,83 @@
+import json
+import platform
+import subprocess
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+
+# Metrics where a larger value is better; everything else is a latency.
+HIGHER_IS_BETTER = {"requests_per_second"}
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: dict, spec: dict) -> dict:
+    return {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "workload": spec,
+        },
+        "results": results,
+    }
+
+
+def save(report: dict, path: Path) -> None:
+    path.write_text(json.dumps(report, indent=2, sort_keys=True))
+
+
+def load(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def compare(base: dict, new: dict, threshold: float, metric: str = "median_ms") -> list[dict]:
+    """
+    Compare two reports benchmark by benchmark.
+
+    A benchmark is flagged as a regression when its metric got worse by more than
+    `threshold` (a fraction, 0.1 being 10%), and as an improvement when it got better by
+    more than that.
+    """
+    rows = []
+    for name in sorted(base["results"].keys() & new["results"].keys()):
+        before = base["results"][name].get(metric)
+        after = new["results"][name].get(metric)
+        if not before or after is None:
+            continue
+
+        change = (after - before) / before
+        if metric in HIGHER_IS_BETTER:
+            change = -change
+
+        status = "ok"
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        rows.append({"name": name, "before": before, "after": after, "change": change, "status": status})
+    return rows
+
+
+def format_comparison(rows: list[dict], metric: str) -> str:
+    width = max((len(row["name"]) for row in rows), default=10)
+    lines = [f"{'benchmark':<{width}}  {metric + ' before':>18}  {metric + ' after':>18}  {'change':>8}"]
+    for row in rows:
+        flag = {"regression": "  << REGRESSION", "improvement": "  improved"}.get(row["status"], "")
+        lines.append(
+            f"{row['name']:<{width}}  {row['before']:>18.3f}  {row['after']:>18.3f}  "
+            f"{row['change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timedelta
+
+from benchmarks.timing import measure
+from benchmarks.workload import WorkloadSpec, generate_shape_layers
+
+
+def run(spec: WorkloadSpec, layer_count: int, repeat: int) -> dict:
+    """Compare the validated response path with the trusted orjson path on a large project."""
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from app.api.utils.serialize import json_response, project_to_dict
+    from app.models.layer import Layer
+    from app.models.project import Project
+    from app.models.user import User  # noqa: F401 - registers the mapper Project relates to
+    from app.schemas.project import Project as ProjectSchema
+
+    per_type = -(-layer_count // 4)
+    shapes = generate_shape_layers(WorkloadSpec(layers_per_type=per_type, pen_points=spec.pen_points))
+    shapes = shapes[:layer_count]
+
+    created_at = datetime(2025, 1, 1)
+    project = Project(
+        id="01HRBK8YNPXN5WK0Q23BACDMR5",
+        name="serialization",
+        width=spec.width,
+        height=spec.height,
+        created_at=created_at,
+        revision=0,
+    )
+    rows = [
+        {
+            "type": shape["type"],
+            "properties": shape["properties"],
+            "id": f"{index:026d}",
+            "project_id": project.id,
+            "created_at": created_at + timedelta(seconds=index),
+            "version": 1,
+        }
+        for index, shape in enumerate(shapes)
+    ]
+    project.layers = [Layer(**row) for row in rows]
+
+    adapter = TypeAdapter(ProjectSchema)
+
+    def validated() -> bytes:
+        # What FastAPI does for `response_model=Project` with an ORM object.
+        value = adapter.validate_python(project, from_attributes=True)
+        return json.dumps(jsonable_encoder(adapter.dump_python(value, mode="json"))).encode()
+
+    def trusted() -> bytes:
+        return json_response(project_to_dict(project, rows)).body
+
+    def trusted_gzip() -> bytes:
+        return json_response(project_to_dict(project, rows), accept_encoding="gzip").body
+
+    return {
+        f"serialize.validated.{layer_count}": measure(validated, repeat),
+        f"serialize.orjson.{layer_count}": measure(trusted, repeat),
+        f"serialize.orjson_gzip.{layer_count}": measure(trusted_gzip, repeat),
+    }
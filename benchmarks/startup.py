@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.timing import summarize
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CHILD = "from benchmarks.startup import measure_cold_start; measure_cold_start()"
+
+
+def measure_cold_start() -> None:
+    """
+    Time one cold start, in a fresh interpreter: importing the app, running its lifespan,
+    and serving its first request and first render. Prints the timings as JSON.
+    """
+    timings = {}
+    started = time.perf_counter()
+    from app.main import app
+
+    timings["startup.import_app"] = time.perf_counter() - started
+
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+
+    prefix, admin = settings.API_V1_STR, {"X-API-Key": settings.ADMIN_API_KEY}
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        timings["startup.lifespan"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        client.post(
+            f"{prefix}/auth/register", json={"email": "a@example.com", "username": "a"}, headers=admin
+        )
+        timings["startup.first_request"] = time.perf_counter() - started
+
+        token = client.post(f"{prefix}/auth/make_key", params={"username": "a"}, headers=admin).json()
+        headers = {"X-API-Key": token["access_token"]}
+        project_id = client.post(f"{prefix}/projects", json={"name": "cold"}, headers=headers).json()["id"]
+
+        started = time.perf_counter()
+        client.get(f"{prefix}/projects/{project_id}/render", headers=headers).raise_for_status()
+        timings["startup.first_render"] = time.perf_counter() - started
+
+    print(json.dumps(timings))
+
+
+def run(workdir: Path, runs: int) -> dict:
+    """Measure `runs` cold starts, each in its own interpreter against its own database."""
+    samples = defaultdict(list)
+    python_path = os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))
+    for index in range(runs):
+        env = {
+            **os.environ,
+            "PYTHONPATH": python_path,
+            "SQLALCHEMY_DATABASE_URL": f"sqlite:///{workdir / f'startup-{index}.db'}",
+        }
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD], env=env, cwd=workdir, check=True, capture_output=True, text=True
+        ).stdout
+        for name, seconds in json.loads(output.splitlines()[-1]).items():
+            samples[name].append(seconds)
+    return {name: summarize(values) for name, values in samples.items()}
@@ -0,0 +1,29 @@
+import statistics
+import time
+from collections.abc import Callable
+
+
+def summarize(samples: list[float]) -> dict:
+    """Summarize durations in seconds as millisecond statistics."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p95_ms": round(p95 * 1000, 4),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    """Time `repeat` calls of `fn` after `warmup` untimed calls."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
@@ -0,0 +1,135 @@
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from PIL import Image
+
+SHAPE_TYPES = ("rectangle", "circle", "arc", "pen")
+
+
+@dataclass
+class WorkloadSpec:
+    """Shape of a synthetic project."""
+
+    width: int = 1600
+    height: int = 1200
+    layers_per_type: int = 50
+    pen_points: int = 200
+    image_layers: int = 4
+    image_size: tuple[int, int] = (640, 480)
+    adjust_images: bool = True
+    resize_images: bool = True
+    seed: int = 1234
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _color(rng: random.Random) -> str:
+    return f"#{rng.randrange(0x1000000):06x}"
+
+
+def _shape_properties(layer_type: str, spec: WorkloadSpec, rng: random.Random) -> dict:
+    x = rng.uniform(0, spec.width)
+    y = rng.uniform(0, spec.height)
+
+    if layer_type == "rectangle":
+        return {
+            "x": x,
+            "y": y,
+            "width": rng.uniform(1, spec.width / 4),
+            "height": rng.uniform(1, spec.height / 4),
+            "color": _color(rng),
+        }
+    if layer_type == "circle":
+        return {"x": x, "y": y, "radius": rng.uniform(1, spec.width / 8), "color": _color(rng)}
+    if layer_type == "arc":
+        start = rng.uniform(0, 360)
+        return {
+            "x": x,
+            "y": y,
+            "radius": rng.uniform(1, spec.width / 8),
+            "start_angle": start,
+            "end_angle": start + rng.uniform(10, 350),
+            "stroke_width": rng.uniform(1, 8),
+            "color": _color(rng),
+        }
+
+    points = []
+    for _ in range(spec.pen_points):
+        x = min(max(x + rng.uniform(-15, 15), 0), spec.width)
+        y = min(max(y + rng.uniform(-15, 15), 0), spec.height)
+        points.append({"x": x, "y": y})
+    return {"points": points, "stroke_width": rng.uniform(1, 6), "color": _color(rng)}
+
+
+def write_source_image(path: Path, size: tuple[int, int], rng: random.Random) -> Path:
+    """Write a noisy RGB PNG, which compresses about as badly as a photo."""
+    image = Image.effect_noise(size, 64).convert("RGB")
+    tint = Image.new("RGB", size, _color(rng))
+    Image.blend(image, tint, 0.5).save(path, format="PNG")
+    return path
+
+
+def image_properties(path: Path, spec: WorkloadSpec, rng: random.Random) -> dict:
+    properties = {
+        "path": str(path),
+        "x": rng.uniform(0, spec.width / 2),
+        "y": rng.uniform(0, spec.height / 2),
+        "contrast": 1.0,
+        "brightness": 1.0,
+        "sharpness": 1.0,
+    }
+    if spec.adjust_images:
+        properties.update(contrast=1.3, brightness=0.8, sharpness=1.6)
+    if spec.resize_images:
+        properties.update(width=spec.image_size[0] * 1.5, height=spec.image_size[1] * 1.5)
+    return properties
+
+
+def generate_shape_layers(spec: WorkloadSpec) -> list[dict]:
+    """Generate `{"type", "properties"}` dicts for every shape layer of the workload."""
+    rng = random.Random(spec.seed)
+    return [
+        {"type": layer_type, "properties": _shape_properties(layer_type, spec, rng)}
+        for _ in range(spec.layers_per_type)
+        for layer_type in SHAPE_TYPES
+    ]
+
+
+def generate_layers(spec: WorkloadSpec, image_dir: Path) -> list[dict]:
+    """Generate shape layers plus image layers backed by files written to `image_dir`."""
+    rng = random.Random(spec.seed + 1)
+    image_dir.mkdir(parents=True, exist_ok=True)
+
+    layers = generate_shape_layers(spec)
+    for index in range(spec.image_layers):
+        path = write_source_image(image_dir / f"source_{index}.png", spec.image_size, rng)
+        layers.insert(
+            index * len(layers) // max(spec.image_layers, 1),
+            {
+                "type": "image",
+                "properties": image_properties(path, spec, rng),
+            },
+        )
+    return layers
+
+
+def build_project(spec: WorkloadSpec, layers: list[dict]):
+    """Build transient (unsaved) ORM objects for rendering without a database."""
+    from app.models.layer import Layer
+    from app.models.project import Project
+    from app.models.user import User  # noqa: F401 - registers the mapper Project relates to
+
+    project = Project(name="benchmark", width=spec.width, height=spec.height, revision=0)
+    created_at = datetime(2025, 1, 1)
+    return project, [
+        Layer(
+            id=f"{index:026d}",
+            type=layer["type"],
+            properties=layer["properties"],
+            created_at=created_at + timedelta(seconds=index),
+        )
+        for index, layer in enumerate(layers)
+    ]
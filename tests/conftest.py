@@ -0,0 +1,62 @@
+import io
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when the app is imported, and uploads, profiles and the database are
+# written relative to the working directory.
+os.chdir(tempfile.mkdtemp(prefix="photo-editing-tests-"))
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ADMIN_API_KEY", "admin")
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.getcwd()}/test.db"
+os.environ["AUTO_CREATE_SCHEMA"] = "true"
+os.environ["RENDER_BURST"] = os.environ["UPLOAD_BURST"] = "1e9"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from PIL import Image  # noqa: E402
+from ulid import ULID  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+ADMIN = {"X-API-Key": "admin"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def headers(client) -> dict[str, str]:
+    """Auth headers of a newly registered user."""
+    username = f"user{ULID()}".lower()
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": f"{username}@example.com", "username": username},
+        headers=ADMIN,
+    )
+    assert response.status_code == 200, response.text
+    response = client.post("/api/v1/auth/make_key", params={"username": username}, headers=ADMIN)
+    return {"X-API-Key": response.json()["access_token"]}
+
+
+@pytest.fixture
+def project(client, headers) -> str:
+    """URL of a new project owned by the `headers` user."""
+    response = client.post("/api/v1/projects", json={"name": "test"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return f"/api/v1/projects/{response.json()['id']}"
+
+
+@pytest.fixture
+def make_png():
+    """Encode a solid colour PNG."""
+
+    def make_png(size: tuple[int, int] = (50, 40), color="red", mode: str = "RGB") -> bytes:
+        buffer = io.BytesIO()
+        Image.new(mode, size, color).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    return make_png
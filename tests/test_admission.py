@@ -0,0 +1,54 @@
+import pytest
+
+from app.api.utils import display_list, render
+from app.api.utils.admission import RENDER_BASE_COST, RENDER_COST_PER_IMAGE, renders
+
+
+@pytest.fixture
+def render_budget(monkeypatch):
+    """Give each user a render bucket of `budget` tokens that barely refills."""
+
+    def render_budget(budget: float):
+        monkeypatch.setattr(renders, "burst", budget)
+        monkeypatch.setattr(renders, "rate", 1e-6)
+
+    return render_budget
+
+
+def test_cache_hits_pay_the_base_cost(client, headers, project, make_png, render_budget):
+    for name in ("a.png", "b.png"):
+        client.post(f"{project}/upload", files={"file": (name, make_png())}, headers=headers)
+    # 800x600 canvas, two images
+    cost = RENDER_BASE_COST + 0.48 + 2 * RENDER_COST_PER_IMAGE
+    render_budget(cost + 2.5 * RENDER_BASE_COST)
+
+    statuses = [client.get(f"{project}/render", headers=headers).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_rejected_renders_are_not_compiled(client, headers, project, render_budget, monkeypatch):
+    compiled = []
+    get = display_list.display_lists.get
+    monkeypatch.setattr(
+        render.display_lists, "get", lambda project: compiled.append(project) or get(project)
+    )
+    render_budget(1.5 * RENDER_BASE_COST)
+    assert client.get(f"{project}/render", headers=headers).status_code == 200
+    client.post(
+        f"{project}/layers/rectangle",
+        json={"x": 1, "y": 1, "width": 10, "height": 10, "color": "#ff0000"},
+        headers=headers,
+    )
+
+    response = client.get(f"{project}/render", headers=headers)
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+    assert len(compiled) == 1
+
+
+def test_render_over_budget_is_refused_after_compiling(client, headers, project, make_png, render_budget):
+    client.post(f"{project}/upload", files={"file": ("a.png", make_png())}, headers=headers)
+    render_budget(2 * RENDER_BASE_COST)
+
+    assert client.get(f"{project}/render", headers=headers).status_code == 429
+    assert renders.concurrency._active == 0
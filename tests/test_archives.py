@@ -0,0 +1,105 @@
+import io
+import zipfile
+
+import orjson
+import pytest
+from PIL import Image, ImageDraw
+
+from app.api.utils.display_list import PasteImage
+from app.api.utils.image import FINAL
+from app.api.utils.ingest import UPLOAD_DIR
+
+IMPORT = "/api/v1/projects/import"
+HEADER = {"format": "raspi-api.project", "version": 1, "project": {"name": "imported"}}
+
+
+def _archive(layers: list[dict], images: dict[str, bytes] | None = None, header: dict = HEADER) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("project.json", orjson.dumps(header))
+        archive.writestr("layers.jsonl", b"\n".join(orjson.dumps(layer) for layer in layers))
+        for name, content in (images or {}).items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _rectangle(layer_id: str, parent_id: str | None = None) -> dict:
+    properties = {"x": 1, "y": 1, "width": 10, "height": 10, "color": "#ff0000"}
+    return {"id": layer_id, "parent_id": parent_id, "type": "rectangle", "properties": properties}
+
+
+def _group(layer_id: str, parent_id: str | None = None) -> dict:
+    return {"id": layer_id, "parent_id": parent_id, "type": "group", "properties": {"name": "g"}}
+
+
+def _import(client, headers, content: bytes):
+    return client.post(IMPORT, files={"file": ("project.zip", content)}, headers=headers)
+
+
+def test_round_trip(client, headers, project, make_png):
+    rectangle = client.post(
+        f"{project}/layers/rectangle",
+        json={"x": 1, "y": 1, "width": 10, "height": 10, "color": "#00ff00"},
+        headers=headers,
+    ).json()
+    client.post(f"{project}/upload", files={"file": ("a.png", make_png())}, headers=headers)
+    client.post(f"{project}/layers/group", json={"children": [rectangle["id"]]}, headers=headers)
+
+    archive = client.get(f"{project}/archive", headers=headers)
+    assert archive.status_code == 200
+    response = _import(client, headers, archive.content)
+    assert response.status_code == 200, response.text
+    imported = f"/api/v1/projects/{response.json()['id']}"
+
+    original, copy = (client.get(url, headers=headers).json()["layers"] for url in (project, imported))
+    assert [layer["type"] for layer in copy] == [layer["type"] for layer in original]
+    assert {layer["id"] for layer in copy}.isdisjoint(layer["id"] for layer in original)
+    renders = [client.get(f"{url}/render", headers=headers).content for url in (project, imported)]
+    assert renders[0] == renders[1]
+
+
+def _assert_rejected(client, headers, content: bytes, status_code: int, detail: str) -> None:
+    projects = len(client.get("/api/v1/projects", headers=headers).json())
+    uploads = set(UPLOAD_DIR.iterdir()) if UPLOAD_DIR.exists() else set()
+
+    response = _import(client, headers, content)
+    assert response.status_code == status_code
+    assert detail in response.json()["detail"]
+    assert len(client.get("/api/v1/projects", headers=headers).json()) == projects
+    assert (set(UPLOAD_DIR.iterdir()) if UPLOAD_DIR.exists() else set()) == uploads
+
+
+@pytest.mark.parametrize(
+    ("content", "detail"),
+    [
+        (b"not a zip", "Not a project archive"),
+        (_archive([], header={**HEADER, "version": 2}), "Unsupported archive version"),
+        (_archive([_rectangle("a", parent_id="missing")]), "missing from the archive"),
+        (_archive([_rectangle("a"), _rectangle("b", parent_id="a")]), "only be nested in groups"),
+        (_archive([_group("a", parent_id="b"), _group("b", parent_id="a")]), "contain themselves"),
+        (_archive([{"id": "a", "type": "rectangle", "properties": {}}]), "Invalid layer on line 1"),
+    ],
+)
+def test_invalid_archives_are_rejected(client, headers, content, detail):
+    _assert_rejected(client, headers, content, 400, detail)
+
+
+def test_images_are_checked(client, headers, make_png, monkeypatch):
+    image = {"id": "i", "type": "image", "properties": {"x": 0, "y": 0, "path": "images/0_a.png"}}
+    images = {"images/0_a.png": make_png(), "images/1_b.png": b"not an image"}
+    _assert_rejected(client, headers, _archive([image], images), 400, "images/1_b.png")
+
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+    _assert_rejected(
+        client, headers, _archive([image], {"images/0_a.png": make_png()}), 413, "images/0_a.png"
+    )
+
+
+def test_renders_skip_decompression_bombs(tmp_path, make_png, monkeypatch):
+    path = tmp_path / "bomb.png"
+    path.write_bytes(make_png(size=(50, 40)))
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+
+    canvas = Image.new("RGBA", (60, 60))
+    PasteImage({"path": str(path), "x": 0, "y": 0}).execute(canvas, ImageDraw.Draw(canvas), FINAL)
+    assert canvas.getbbox() is None
@@ -0,0 +1,61 @@
+import io
+import threading
+import zipfile
+
+import orjson
+
+from app.api.utils import export, render
+from app.api.utils.admission import renders
+from app.core.rate_limit import ConcurrencyLimiter
+
+
+def _export(client, headers, **body):
+    response = client.post("/api/v1/projects/export", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    return archive.namelist(), orjson.loads(archive.read("manifest.json"))
+
+
+def test_export_renders_take_render_slots(client, headers, monkeypatch):
+    for i in range(6):
+        client.post("/api/v1/projects", json={"name": f"p{i}", "width": 64, "height": 64}, headers=headers)
+
+    busy = []
+    render_image = render.render_image
+
+    def record_slots(display_list, quality):
+        busy.append(renders.concurrency._active)
+        return render_image(display_list, quality)
+
+    monkeypatch.setattr(render, "render_image", record_slots)
+    monkeypatch.setattr(renders.concurrency, "limit", 1)
+
+    names, manifest = _export(client, headers)
+    assert len(names) == 7
+    assert len(manifest["projects"]) == 6
+    assert manifest["failed"] == []
+    assert busy == [1] * 6
+    assert renders.concurrency._active == 0
+
+
+def test_exports_share_one_pool(client, headers):
+    client.post("/api/v1/projects", json={"name": "p", "width": 64, "height": 64}, headers=headers)
+    pool = export._export_pool
+    for _ in range(3):
+        _export(client, headers, format="jpg", quality="draft")
+    assert export._export_pool is pool
+    assert len(pool._threads) <= export.settings.EXPORT_WORKERS
+
+
+def test_concurrency_limiter_waits_for_release():
+    limiter = ConcurrencyLimiter(1)
+    limiter.acquire()
+    assert not limiter.try_acquire()
+
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.05)
+    limiter.release()
+    assert acquired.wait(1)
+    waiter.join()
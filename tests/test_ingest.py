@@ -0,0 +1,29 @@
+from PIL import Image
+
+from app.api.utils.ingest import normalize_upload, open_render_ready
+
+
+def _rotated_jpeg(path):
+    """A 40x20 JPEG whose EXIF orientation turns it upright at 20x40."""
+    image = Image.new("RGB", (40, 20), "blue")
+    image.paste((255, 0, 0), (0, 0, 10, 20))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    image.save(path, "JPEG", exif=exif)
+
+
+def test_fallback_matches_derivative(tmp_path):
+    source = tmp_path / "rotated.jpg"
+    _rotated_jpeg(source)
+
+    fallback = open_render_ready(source)
+    assert fallback.mode == "RGBA"
+    assert fallback.size == (20, 40)
+    band = open_render_ready(source, (5, 15))
+    assert band.size == (20, 10)
+
+    normalize_upload(source)
+    derivative = open_render_ready(source)
+    assert derivative.size == fallback.size
+    assert derivative.tobytes() == fallback.tobytes()
+    assert band.tobytes() == derivative.crop((0, 5, 20, 15)).tobytes()
@@ -0,0 +1,76 @@
+import pytest
+
+from app.api.utils.layer_patch import merge_patch
+
+MERGE_PATCH = {"Content-Type": "application/merge-patch+json"}
+
+
+@pytest.fixture
+def rectangle(client, headers, project) -> str:
+    response = client.post(
+        f"{project}/layers/rectangle",
+        json={"x": 10, "y": 10, "width": 20, "height": 20, "color": "#ff0000"},
+        headers=headers,
+    )
+    return f"{project}/{response.json()['id']}"
+
+
+def _patch(client, headers, layer, body: str, **extra_headers):
+    return client.patch(layer, content=body, headers={**headers, **MERGE_PATCH, **extra_headers})
+
+
+def test_merge_patch():
+    target = {"a": 1, "b": {"c": 2, "d": 3}}
+    assert merge_patch(target, {"a": None, "b": {"c": 4, "d": None}, "e": [1]}) == {"b": {"c": 4}, "e": [1]}
+    assert merge_patch(target, [1]) == [1]
+    assert target == {"a": 1, "b": {"c": 2, "d": 3}}
+
+
+def test_patch_moves_layer(client, headers, rectangle):
+    response = _patch(client, headers, rectangle, '{"x": 50}')
+    assert response.status_code == 200, response.text
+    assert response.json()["properties"]["x"] == 50
+    assert response.json()["version"] == 2
+    assert response.headers["etag"] == '"2"'
+    assert response.headers["x-changed-bbox"] == "10,10,70,30"
+
+
+def test_if_match(client, headers, rectangle):
+    response = _patch(client, headers, rectangle, '{"x": 1}', **{"If-Match": '"2"'})
+    assert response.status_code == 412
+    assert response.headers["etag"] == '"1"'
+
+    assert _patch(client, headers, rectangle, '{"x": 1}', **{"If-Match": '"0", "1"'}).status_code == 200
+    assert _patch(client, headers, rectangle, '{"x": 2}', **{"If-Match": '"1"'}).status_code == 412
+    assert _patch(client, headers, rectangle, '{"x": 3}', **{"If-Match": "*"}).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        '{"radius": 5}',
+        '{"width": -1}',
+        '{"color": null}',
+    ],
+)
+def test_invalid_patches_are_rejected(client, headers, project, rectangle, body):
+    response = _patch(client, headers, rectangle, body)
+    assert response.status_code == 422
+    assert client.get(project, headers=headers).json()["layers"][0]["version"] == 1
+
+
+def test_plain_json_ignores_nulls(client, headers, rectangle):
+    response = client.patch(rectangle, json={"color": None, "y": 0}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["properties"]["color"] == "#ff0000"
+    assert response.json()["properties"]["y"] == 0
+
+
+def test_image_path_cannot_change(client, headers, project, make_png):
+    layer = client.post(f"{project}/upload", files={"file": ("a.png", make_png())}, headers=headers).json()
+    response = _patch(client, headers, f"{project}/{layer['id']}", '{"path": "/etc/passwd"}')
+    assert response.status_code == 400
+
+
+def test_missing_layer(client, headers, project):
+    assert _patch(client, headers, f"{project}/01ARZ3NDEKTSV4RRFFQ69G5FAV", '{"x": 1}').status_code == 404
@@ -0,0 +1,67 @@
+import io
+from datetime import datetime
+from types import SimpleNamespace
+
+from PIL import Image
+
+from app.api.utils.layer_tree import build_layer_tree
+
+T0, T1 = datetime(2024, 1, 1, 12, 0, 0), datetime(2024, 1, 1, 12, 0, 1)
+
+
+def _layer(layer_id, created_at, parent_id=None, layer_type="rectangle"):
+    return SimpleNamespace(
+        id=layer_id, type=layer_type, properties={}, created_at=created_at, parent_id=parent_id
+    )
+
+
+def _order(nodes):
+    return [(node.id, _order(node.children)) if node.children else node.id for node in nodes]
+
+
+def test_ties_break_on_id():
+    layers = [_layer("01B", T0), _layer("01A", T0), _layer("01C", T0)]
+    assert _order(build_layer_tree(layers)) == ["01A", "01B", "01C"]
+
+
+def test_group_paints_at_its_earliest_child():
+    layers = [
+        _layer("01A", T0, parent_id="01G"),
+        _layer("01B", T0),
+        _layer("01G", T1, layer_type="group"),
+        _layer("01C", T1, parent_id="01G"),
+    ]
+    assert _order(build_layer_tree(layers)) == [("01G", ["01A", "01C"]), "01B"]
+
+
+def test_nested_groups_and_cycles():
+    layers = [
+        _layer("01A", T1, parent_id="01H"),
+        _layer("01B", T0, parent_id="01G"),
+        _layer("01G", T1, parent_id="01H", layer_type="group"),
+        _layer("01H", T1, layer_type="group"),
+        _layer("01X", T0, parent_id="01Y", layer_type="group"),
+        _layer("01Y", T1, parent_id="01X", layer_type="group"),
+        _layer("01Z", T0, parent_id="01MISSING"),
+    ]
+    assert _order(build_layer_tree(layers)) == [("01H", [("01G", ["01B"]), "01A"]), "01X", "01Z", "01Y"]
+
+
+def test_grouping_keeps_layers_under_later_ones(client, headers, project):
+    rectangle = client.post(
+        f"{project}/layers/rectangle",
+        json={"x": 0, "y": 0, "width": 10, "height": 10, "color": "#00ff00"},
+        headers=headers,
+    ).json()
+    overlay = io.BytesIO()
+    Image.new("RGBA", (10, 10), (255, 0, 0, 128)).save(overlay, "PNG")
+    client.post(f"{project}/upload", files={"file": ("overlay.png", overlay.getvalue())}, headers=headers)
+
+    def pixel():
+        response = client.get(f"{project}/render", headers=headers)
+        return Image.open(io.BytesIO(response.content)).getpixel((5, 5))
+
+    before = pixel()
+    response = client.post(f"{project}/layers/group", json={"children": [rectangle["id"]]}, headers=headers)
+    assert response.status_code == 200
+    assert pixel() == before == (128, 127, 0, 255)
@@ -0,0 +1,41 @@
+import pstats
+
+from conftest import ADMIN
+
+PROFILE = {"X-Profile-Key": "admin"}
+
+
+def test_profiled_render_includes_worker_threads(client, headers, project, make_png, tmp_path):
+    client.post(
+        f"{project}/layers/rectangle",
+        json={"x": 1, "y": 1, "width": 10, "height": 10, "color": "#ff0000"},
+        headers=headers,
+    )
+    client.post(f"{project}/upload", files={"file": ("a.png", make_png())}, headers=headers)
+
+    response = client.get(f"{project}/render", params={"quality": "final"}, headers={**headers, **PROFILE})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    summary = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=ADMIN).json()
+    assert summary["status_code"] == 200
+    assert summary["sql"]["count"] > 0
+
+    dump = tmp_path / "render.prof"
+    dump.write_bytes(client.get(f"/api/v1/admin/profiles/{profile_id}/pstats", headers=ADMIN).content)
+    assert any(name == "render_image" for _, _, name in pstats.Stats(str(dump)).stats)
+
+
+def test_profile_key_is_checked(client, headers, project):
+    response = client.get(f"{project}/render", headers={**headers, "X-Profile-Key": "wrong"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+    response = client.get(f"{project}/render", params={"profile_key": "admin"}, headers=headers)
+    assert "x-profile-id" not in response.headers
+
+
+def test_profiles_are_admin_only(client, headers, project):
+    response = client.get(f"{project}/render", headers={**headers, **PROFILE})
+    profile_id = response.headers["x-profile-id"]
+    assert client.get(f"/api/v1/admin/profiles/{profile_id}", headers=headers).status_code == 401
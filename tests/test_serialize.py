@@ -0,0 +1,54 @@
+import gzip
+
+import pytest
+
+from app.api.utils import serialize
+from app.schemas.project import Project
+
+
+def test_project_matches_response_model(client, headers, project, make_png):
+    client.post(f"{project}/upload", files={"file": ("a.png", make_png())}, headers=headers)
+    for x in range(3):
+        client.post(
+            f"{project}/layers/rectangle",
+            json={"x": x, "y": 1, "width": 10, "height": 10, "color": "#ff0000"},
+            headers=headers,
+        )
+
+    body = client.get(project, headers=headers).json()
+    expected = Project.model_validate(body).model_dump(mode="json")
+    assert body.keys() == expected.keys()
+    assert [layer.keys() for layer in body["layers"]] == [layer.keys() for layer in expected["layers"]]
+    assert [layer["id"] for layer in body["layers"]] == sorted(layer["id"] for layer in body["layers"])
+
+
+@pytest.mark.parametrize(
+    ("header", "encoding"),
+    [
+        (None, None),
+        ("gzip", "gzip"),
+        ("gzip;q=0", None),
+        ("gzip; q=0.0, identity", None),
+        ("deflate, gzip;q=0.5", "gzip"),
+        ("*", "gzip"),
+        ("*, gzip;q=0", None),
+    ],
+)
+def test_choose_encoding(monkeypatch, header, encoding):
+    monkeypatch.setattr(serialize, "brotli", None)
+    assert serialize._choose_encoding(header) == encoding
+
+
+def test_choose_encoding_weighs_codings(monkeypatch):
+    monkeypatch.setattr(serialize, "brotli", object())
+    assert serialize._choose_encoding("gzip, br") == "br"
+    assert serialize._choose_encoding("gzip, br;q=0.5") == "gzip"
+    assert serialize._choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_large_responses_are_compressed(monkeypatch):
+    monkeypatch.setattr(serialize.settings, "RESPONSE_COMPRESSION_MIN_SIZE", 0)
+    response = serialize.json_response({"a": 1}, "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == b'{"a":1}'
+    assert "content-encoding" not in serialize.json_response({"a": 1}, "gzip;q=0").headers
@@ -0,0 +1,61 @@
+import base64
+import io
+import xml.etree.ElementTree as ET
+
+import pytest
+from PIL import Image
+
+from app.api.utils.image import apply_image_adjustments
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def _rotated_jpeg() -> bytes:
+    """A 40x20 JPEG whose EXIF orientation turns it upright at 20x40."""
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (40, 20), (200, 40, 40)).save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+def _embedded(svg: ET.Element) -> Image.Image:
+    href = svg.find(f"{SVG}image").get("href")
+    media_type, _, data = href.partition(";base64,")
+    assert media_type == "data:image/png"
+    return Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+def test_image_embeds_render_ready_png(client, headers, project):
+    client.post(f"{project}/upload", files={"file": ("a.jpg", _rotated_jpeg())}, headers=headers)
+    response = client.get(f"{project}/render", headers={**headers, "Accept": "image/svg+xml"})
+    assert response.status_code == 200
+
+    svg = ET.fromstring(response.content)
+    assert svg.find(f"{SVG}image").get("width") == "20"
+    embedded = _embedded(svg)
+    assert embedded.size == (20, 40)
+    assert embedded.mode == "RGBA"
+
+
+@pytest.mark.parametrize(("contrast", "brightness"), [(0.5, 1.0), (1.8, 1.0), (0.6, 1.3)])
+def test_adjustments_match_pillow(client, headers, project, make_png, contrast, brightness):
+    response = client.post(
+        f"{project}/upload", files={"file": ("a.png", make_png(color=(40, 90, 30)))}, headers=headers
+    )
+    layer = response.json()
+    client.patch(
+        f"{project}/{layer['id']}", json={"contrast": contrast, "brightness": brightness}, headers=headers
+    )
+    svg = ET.fromstring(
+        client.get(f"{project}/render", headers={**headers, "Accept": "image/svg+xml"}).content
+    )
+    function = svg.find(f"{SVG}filter/{SVG}feComponentTransfer/{SVG}feFuncR")
+    slope, intercept = float(function.get("slope")), float(function.get("intercept"))
+
+    image = _embedded(svg).convert("RGBA")
+    expected = apply_image_adjustments(image, {"contrast": contrast, "brightness": brightness})
+    red = image.getpixel((0, 0))[0] / 255
+    assert min(max(slope * red + intercept, 0), 1) * 255 == pytest.approx(
+        expected.getpixel((0, 0))[0], abs=1.5
+    )
@@ -0,0 +1,86 @@
+import base64
+import hashlib
+
+
+def _checksum(data: bytes) -> str:
+    return f"sha256 {base64.b64encode(hashlib.sha256(data).digest()).decode()}"
+
+
+def _create(client, headers, project, data: bytes, **body) -> str:
+    response = client.post(
+        f"{project}/uploads", json={"filename": "big.png", "length": len(data), **body}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    assert response.headers["upload-offset"] == "0"
+    return f"{project}/uploads/{response.json()['id']}"
+
+
+def _put(client, headers, upload, data: bytes, offset: int, checksum: str | None = None):
+    chunk_headers = {**headers, "Upload-Offset": str(offset)}
+    if checksum:
+        chunk_headers["Upload-Checksum"] = checksum
+    return client.put(upload, content=data, headers=chunk_headers)
+
+
+def test_chunked_upload(client, headers, project, make_png):
+    data = make_png(size=(300, 200), color=(10, 20, 30))
+    upload = _create(client, headers, project, data, sha256=hashlib.sha256(data).hexdigest())
+    first, rest = data[:100], data[100:]
+
+    assert _put(client, headers, upload, first, 0, _checksum(first)).status_code == 204
+    assert client.head(upload, headers=headers).headers["upload-offset"] == "100"
+
+    response = _put(client, headers, upload, rest, 0)
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == "100"
+
+    response = _put(client, headers, upload, rest, 100, _checksum(first))
+    assert response.status_code == 460
+    assert client.head(upload, headers=headers).headers["upload-offset"] == "100"
+
+    response = _put(client, headers, upload, rest, 100, _checksum(rest))
+    assert response.status_code == 204
+    assert response.headers["upload-offset"] == str(len(data))
+
+    response = client.post(f"{upload}/finalize", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["type"] == "image"
+    digest = base64.b64encode(hashlib.sha256(data).digest()).decode()
+    assert response.headers["repr-digest"] == f"sha-256=:{digest}:"
+    assert client.head(upload, headers=headers).status_code == 404
+
+
+def test_incomplete_upload_cannot_be_finalized(client, headers, project, make_png):
+    data = make_png()
+    upload = _create(client, headers, project, data)
+    _put(client, headers, upload, data[:10], 0)
+
+    response = client.post(f"{upload}/finalize", headers=headers)
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == "10"
+
+
+def test_chunks_past_the_declared_length_are_rejected(client, headers, project, make_png):
+    data = make_png()
+    upload = _create(client, headers, project, data)
+
+    assert _put(client, headers, upload, data + b"extra", 0).status_code == 413
+    assert client.head(upload, headers=headers).headers["upload-offset"] == "0"
+
+
+def test_malformed_checksum(client, headers, project, make_png):
+    data = make_png()
+    upload = _create(client, headers, project, data)
+
+    assert _put(client, headers, upload, data, 0, "md5 AAAA").status_code == 400
+    assert _put(client, headers, upload, data, 0, "sha256 not-base64!").status_code == 400
+
+
+def test_declared_digest_is_checked(client, headers, project, make_png):
+    data = make_png()
+    upload = _create(client, headers, project, data, sha256="0" * 64)
+    _put(client, headers, upload, data, 0)
+
+    response = client.post(f"{upload}/finalize", headers=headers)
+    assert response.status_code == 400
+    assert client.head(upload, headers=headers).status_code == 404